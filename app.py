@@ -1,22 +1,91 @@
 import os
+import importlib
 import logging
 from flask import Flask
-from datetime import datetime
+from flask.json.provider import DefaultJSONProvider
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+from services import json_codec
+from services.compression import init_compression
 
-# Create Flask app
-app = Flask(__name__)
-app.secret_key = os.environ.get("SESSION_SECRET", "ana-conecta-secret-key")
+# Blueprints as "module:attribute". A module (and the services it pulls
+# in) is imported only when create_app() registers its blueprint, so a
+# process can be built with a subset through APP_BLUEPRINTS
+BLUEPRINTS = {
+    "main": "routes:bp",
+    "exports": "export_routes:bp",
+}
 
-# Import routes after app is created to avoid circular imports
-from routes import *
+class CodecJSONProvider(DefaultJSONProvider):
+    """jsonify() through the pluggable serializer in services.json_codec"""
+    def dumps(self, obj, **kwargs):
+        return json_codec.dumps(obj).decode("utf-8")
 
-# Initialize in-memory database
-from models import initialize_db
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(json_codec.dumps(obj), mimetype=self.mimetype)
 
-initialize_db()
+def configure_logging(level=None):
+    # LOG_LEVEL=DEBUG brings back the verbose development logs
+    level = (level or os.environ.get("LOG_LEVEL", "INFO")).upper()
+    logging.basicConfig(level=getattr(logging, level, logging.INFO))
+
+def load_blueprint(name):
+    module_name, attribute = BLUEPRINTS[name].split(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+def restore_stores():
+    """
+    Reload the in-memory stores from the write-ahead log when WAL_DIR is
+    set. Runs once, after every module defining a store is imported.
+    """
+    from services.wal import get_journal
+    journal = get_journal()
+    if journal is None or journal.file is not None:
+        return None
+    import models
+    import client_portal  # noqa: F401 (registers the portal stores)
+    result = journal.recover()
+    models.resume_record_versions(journal.stores.values())
+    logging.info(f"Restored {result['records']} records and replayed {result['replayed']} writes from {journal.directory}")
+    return result
+
+def create_app(blueprints=None, seed=True):
+    """
+    Build the Flask app: logging, JSON and compression, the requested
+    blueprints (all by default), the CLI commands, the stores saved in
+    the write-ahead log and the sample data
+    """
+    configure_logging()
+
+    app = Flask(__name__)
+    app.secret_key = os.environ.get("SESSION_SECRET", "ana-conecta-secret-key")
+    app.json = CodecJSONProvider(app)
+
+    # Negotiated gzip/brotli for large buffered responses
+    init_compression(app)
+
+    if blueprints is None:
+        blueprints = os.environ.get("APP_BLUEPRINTS", ",".join(BLUEPRINTS)).split(",")
+    for name in blueprints:
+        app.register_blueprint(load_blueprint(name.strip()))
+
+    from cli import import_profile
+    app.cli.add_command(import_profile)
+
+    restore_stores()
+
+    if seed:
+        # Initialize in-memory database (both seeders are idempotent)
+        from models import initialize_db
+        from client_portal import initialize_client_portal_data
+
+        initialize_db()
+        initialize_client_portal_data()
+
+    return app
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    configure_logging("DEBUG")
+    # The reloader's parent would also open the write-ahead log, which
+    # only one process may hold
+    create_app().run(host="0.0.0.0", port=5000, debug=True, use_reloader=not os.environ.get("WAL_DIR"))
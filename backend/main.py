@@ -1,27 +1,111 @@
 #!/usr/bin/env python3
-from flask import Flask, jsonify
+from flask import Flask, Response, request
 from flask_cors import CORS
 import json
+import logging
 import os
+import threading
+from datetime import datetime, timezone
+
+try:
+    from backend.snapshot import Snapshot, build_snapshot, compile_snapshot, open_snapshot
+except ImportError:
+    # Run as a script from backend/ (python3 main.py)
+    from snapshot import Snapshot, build_snapshot, compile_snapshot, open_snapshot
 
 app = Flask(__name__)
 CORS(app)
 
-DATA_FILE = 'ana-conecta/backend/db.json'
+# db.json sits next to this module; DATA_FILE overrides it
+DATA_FILE = os.environ.get('DATA_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db.json'))
+
+# Compiled by snapshot.py (at build time, or here when missing or stale)
+SNAPSHOT_FILE = os.environ.get('SNAPSHOT_FILE', os.path.splitext(DATA_FILE)[0] + '.snap')
+
+# (signature, snapshot): db.json's signature and the mapped snapshot
+# compiled from it, replaced as a whole whenever the file changes
+_cache = (None, None)
+_cache_lock = threading.Lock()
+
+def file_signature(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def open_current_snapshot(signature):
+    """
+    Map SNAPSHOT_FILE if it was compiled from db.json as it is now,
+    recompiling it otherwise. Without a writable directory the snapshot
+    is kept in this process's memory instead.
+    """
+    try:
+        snapshot = open_snapshot(SNAPSHOT_FILE)
+        if snapshot.signature == signature:
+            return snapshot
+    except (OSError, ValueError):
+        pass  # missing, empty or not a snapshot
+    try:
+        build_snapshot(DATA_FILE, SNAPSHOT_FILE)
+        return open_snapshot(SNAPSHOT_FILE)
+    except OSError as e:
+        logging.warning(f"Serving {DATA_FILE} from memory, snapshot not written: {e}")
+        with open(DATA_FILE, 'r', encoding='utf-8') as f:
+            return Snapshot(compile_snapshot(json.load(f), signature))
+
+def load_cache():
+    """
+    Return the cached (signature, snapshot) for DATA_FILE. Each call
+    costs one stat(); the snapshot is remapped only when db.json's mtime
+    or size changes, by a single thread while the others wait for it.
+    """
+    global _cache
+    signature = file_signature(DATA_FILE)
+    cache = _cache
+    if cache[0] == signature:
+        return cache
 
-def load_data():
-    with open(DATA_FILE, 'r') as f:
-        return json.load(f)
+    with _cache_lock:
+        if _cache[0] != signature:
+            _cache = (signature, open_current_snapshot(signature))
+        return _cache
+
+def json_slice_response(signature, body, tag):
+    """
+    Serve JSON bytes sliced from the snapshot, validated by db.json's mtime
+    and size: a matching If-None-Match or If-Modified-Since gets a bodiless 304
+    """
+    response = Response(body, mimetype='application/json')
+    response.set_etag(f'{signature[0]:x}-{signature[1]:x}-{tag}')
+    response.last_modified = datetime.fromtimestamp(signature[0] / 1e9, timezone.utc)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def collection_response(name):
+    signature, snapshot = load_cache()
+    # A collection missing from db.json is served as an empty list
+    return json_slice_response(signature, snapshot.collection(name) or b'[]', name)
+
+def item_response(name, item_id):
+    signature, snapshot = load_cache()
+    body = snapshot.item(name, item_id)
+    if body is None:
+        return Response(b'{"error": "Not found"}', status=404, mimetype='application/json')
+    return json_slice_response(signature, body, f'{name}-{item_id}')
 
 @app.route('/api/iniciativas', methods=['GET'])
 def get_iniciativas():
-    data = load_data()
-    return jsonify(data['iniciativas'])
+    return collection_response('iniciativas')
+
+@app.route('/api/iniciativas/<int:item_id>', methods=['GET'])
+def get_iniciativa(item_id):
+    return item_response('iniciativas', item_id)
 
 @app.route('/api/propostas', methods=['GET'])
 def get_propostas():
-    data = load_data()
-    return jsonify(data['propostas'])
+    return collection_response('propostas')
+
+@app.route('/api/propostas/<int:item_id>', methods=['GET'])
+def get_proposta(item_id):
+    return item_response('propostas', item_id)
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8080))
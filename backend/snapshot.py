@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Read-only binary snapshot of db.json, served straight from an mmap.
+
+    python backend/snapshot.py [db.json] [db.snap]
+
+Layout (little-endian):
+    header      magic, mtime_ns and size of the source db.json,
+                number of collections
+    directory   per collection: name, body offset and length, record
+                count, index offset
+    indexes     per collection: (id, offset, length) of each record with
+                an integer id, sorted by id
+    bodies      each collection pre-encoded as a JSON document; record
+                offsets point inside it, so a record is a slice of its
+                collection's body
+
+Every worker maps the same file, so they share one copy in the page
+cache and nothing is parsed to answer a request.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b"DBSNAP02"
+HEADER = struct.Struct("<8sQQI")
+NAME_LENGTH = struct.Struct("<H")
+DIRECTORY_ENTRY = struct.Struct("<QQIQ")
+INDEX_ENTRY = struct.Struct("<qQI")
+
+def encode(value):
+    # What Flask's jsonify served before the snapshot: sorted keys,
+    # compact separators, non-ASCII escaped
+    return json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+def encode_collection(value):
+    """
+    Return a collection's JSON body, ending in a newline like jsonify's,
+    and its index entries (id, offset, length)
+    """
+    if not isinstance(value, list):
+        return encode(value) + b"\n", []
+    parts = [encode(item) for item in value]
+    entries = []
+    offset = 1  # past "["
+    for item, part in zip(value, parts):
+        if isinstance(item, dict) and type(item.get("id")) is int:
+            entries.append((item["id"], offset, len(part)))
+        offset += len(part) + 1  # the "," between items
+    entries.sort()
+    return b"[" + b",".join(parts) + b"]\n", entries
+
+def compile_snapshot(data, signature):
+    """
+    Encode parsed db.json data, read when the file had the given
+    (mtime_ns, size) signature, as snapshot bytes
+    """
+    collections = []
+    for name, value in data.items():
+        body, entries = encode_collection(value)
+        collections.append((name.encode("utf-8"), body, entries))
+
+    position = HEADER.size + sum(NAME_LENGTH.size + len(name) + DIRECTORY_ENTRY.size for name, _, _ in collections)
+    index_offsets = []
+    for _, _, entries in collections:
+        index_offsets.append(position)
+        position += len(entries) * INDEX_ENTRY.size
+    body_offsets = []
+    for _, body, _ in collections:
+        body_offsets.append(position)
+        position += len(body)
+
+    parts = [HEADER.pack(MAGIC, signature[0], signature[1], len(collections))]
+    for (name, body, entries), index_offset, body_offset in zip(collections, index_offsets, body_offsets):
+        parts.append(NAME_LENGTH.pack(len(name)) + name)
+        parts.append(DIRECTORY_ENTRY.pack(body_offset, len(body), len(entries), index_offset))
+    for (_, _, entries), body_offset in zip(collections, body_offsets):
+        parts.extend(INDEX_ENTRY.pack(item_id, body_offset + offset, length) for item_id, offset, length in entries)
+    parts.extend(body for _, body, _ in collections)
+    return b"".join(parts)
+
+def build_snapshot(source, target):
+    """
+    Compile the db.json at `source` into a snapshot at `target`, replaced
+    atomically so readers never map a half-written file
+    """
+    stat = os.stat(source)
+    with open(source, "r", encoding="utf-8") as source_file:
+        data = json.load(source_file)
+    snapshot = compile_snapshot(data, (stat.st_mtime_ns, stat.st_size))
+    temporary = f"{target}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as target_file:
+        target_file.write(snapshot)
+    os.replace(temporary, target)
+    return snapshot
+
+class Snapshot:
+    """
+    Reader over snapshot bytes (an mmap, or bytes when it couldn't be written)
+    """
+    def __init__(self, buffer):
+        self.buffer = buffer
+        magic, mtime_ns, size, count = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a db.json snapshot")
+        self.signature = (mtime_ns, size)
+        self.collections = {}  # name -> (body offset, body length, record count, index offset)
+        position = HEADER.size
+        for _ in range(count):
+            (length,) = NAME_LENGTH.unpack_from(buffer, position)
+            position += NAME_LENGTH.size
+            name = bytes(buffer[position:position + length]).decode("utf-8")
+            position += length
+            self.collections[name] = DIRECTORY_ENTRY.unpack_from(buffer, position)
+            position += DIRECTORY_ENTRY.size
+
+    def collection(self, name):
+        """The collection's JSON body, or None if db.json has no such key"""
+        entry = self.collections.get(name)
+        if entry is None:
+            return None
+        offset, length, _, _ = entry
+        return self.buffer[offset:offset + length]
+
+    def item(self, name, item_id):
+        """The JSON of the record with this id, by binary search of the index"""
+        entry = self.collections.get(name)
+        if entry is None:
+            return None
+        _, _, count, index_offset = entry
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if INDEX_ENTRY.unpack_from(self.buffer, index_offset + middle * INDEX_ENTRY.size)[0] < item_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low == count:
+            return None
+        found_id, offset, length = INDEX_ENTRY.unpack_from(self.buffer, index_offset + low * INDEX_ENTRY.size)
+        if found_id != item_id:
+            return None
+        return self.buffer[offset:offset + length]
+
+def open_snapshot(path):
+    with open(path, "rb") as snapshot_file:
+        # The mapping stays valid after the file is closed
+        return Snapshot(mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ))
+
+if __name__ == "__main__":
+    directory = os.path.dirname(os.path.abspath(__file__))
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join(directory, "db.json")
+    target = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(source)[0] + ".snap"
+    size = len(build_snapshot(source, target))
+    print(f"{source} -> {target} ({size} bytes)")
@@ -0,0 +1,76 @@
+"""
+Payload benchmark for the read APIs: encode time per serializer and
+bytes on the wire per content coding, endpoint by endpoint.
+
+    python -m benchmarks.api_payloads [clients]
+
+The stores are filled with `clients` clients (default 500), one
+mentorship and one client service per client (with chat, timeline and
+meetings) and 50 podcast episodes with long summaries.
+"""
+import sys
+import timeit
+
+from services import json_codec
+from services.compression import CODINGS
+
+def seed(count):
+    from client_portal import add_client_service, add_podcast_episode
+    from services.client_service import create_client
+    from services.mentorship_service import create_mentorship
+
+    for i in range(count):
+        client = create_client(f"Cliente {i}", f"cliente{i}@example.com", f"119{i:08d}", notes="Indicação do podcast")
+        create_mentorship(client["id"], f"Mentoria {i}", "Mentoria em liderança e desenvolvimento de carreira")
+        service = add_client_service(f"Serviço {i}", client["id"], description="Programa de mentoria de 3 meses")
+        for n in range(30):
+            service.add_chat_message("client" if n % 2 else "admin", f"Mensagem {n} sobre a próxima sessão de mentoria")
+        for n in range(10):
+            service.add_timeline_event(f"Etapa {n}", "Sessão realizada e próximos passos definidos")
+            service.add_meeting("2025-05-10", "Acompanhamento", "Revisão do plano de ação")
+    for i in range(50):
+        add_podcast_episode(f"Episódio {i}", "Conversa sobre carreira", f"2025-04-{i % 28 + 1:02d}",
+                            "https://www.youtube.com/@anaconecta",
+                            "Resumo do episódio com os principais aprendizados da conversa. " * 40)
+
+ENDPOINTS = [
+    "/api/clients",
+    "/api/clients?limit=50",
+    "/api/clients/1",
+    "/api/mentorships",
+    "/api/client-portal/services",
+    "/api/client-portal/services/1",
+    "/api/client-portal/podcasts",
+    "/api/stats",
+]
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    from app import create_app
+    app = create_app()
+    seed(count)
+    client = app.test_client()
+
+    encoders = list(json_codec.ENCODERS)
+    codings = [coding for coding, _ in CODINGS]
+    header = f"{'endpoint':<34}" + "".join(f"{name + ' ms':>12}" for name in encoders)
+    header += f"{'identity B':>14}" + "".join(f"{coding + ' B':>12}" for coding in codings)
+    print(header)
+
+    for endpoint in ENDPOINTS:
+        # Encode the decoded payload so every serializer sees the same value
+        payload = client.get(endpoint, headers={"Accept-Encoding": "identity"}).get_json()
+        row = f"{endpoint:<34}"
+        for name in encoders:
+            encode = json_codec.ENCODERS[name]
+            runs = 20
+            row += f"{timeit.timeit(lambda: encode(payload), number=runs) / runs * 1000:>12.2f}"
+        identity = client.get(endpoint, headers={"Accept-Encoding": "identity"})
+        row += f"{len(identity.data):>14}"
+        for coding in codings:
+            encoded = client.get(endpoint, headers={"Accept-Encoding": coding})
+            row += f"{len(encoded.data):>12}"
+        print(row)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Memory benchmark for the model layer: bytes allocated per record.
+
+    python -m benchmarks.record_memory [count]
+
+Records are built with realistic field values and kept alive while
+tracemalloc measures them; they are never added to the stores.
+"""
+import sys
+import tracemalloc
+
+from models import Client, Initiative, Mentorship
+from client_portal import (
+    ChatMessage, ClientService, Document, Meeting, PodcastEpisode, ScopeItem, TimelineEvent
+)
+
+FACTORIES = {
+    "Client": lambda i: Client(f"Cliente {i}", f"cliente{i}@example.com", f"119{i:08d}"),
+    "Initiative": lambda i: Initiative(f"Iniciativa {i}", "Descrição da iniciativa", "Podcast"),
+    "Mentorship": lambda i: Mentorship(i, f"Mentoria {i}", "Mentoria em Liderança"),
+    "ClientService": lambda i: ClientService(f"Serviço {i}", i),
+    "PodcastEpisode": lambda i: PodcastEpisode(f"Episódio {i}", "Descrição", "2025-04-15", "https://www.youtube.com/@anaconecta"),
+    "ChatMessage": lambda i: ChatMessage("client", f"Mensagem {i}"),
+    "Document": lambda i: Document("contract", f"Contrato_{i}.pdf"),
+    "TimelineEvent": lambda i: TimelineEvent("Contrato Assinado", "Contrato assinado e primeira sessão agendada."),
+    "Meeting": lambda i: Meeting("2025-05-10", "Introdução e Definição de Objetivos"),
+    "ScopeItem": lambda i: ScopeItem("Plano de Ação Individual", "Elaboração de plano de desenvolvimento individual."),
+}
+
+def measure(factory, count):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    records = [factory(i) for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # The list holding the records is not part of their cost
+    allocated -= sys.getsizeof(records)
+    return allocated / count
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print(f"{'model':<16}{'bytes/record':>14}")
+    for name, factory in FACTORIES.items():
+        print(f"{name:<16}{measure(factory, count):>14.1f}")
+
+if __name__ == "__main__":
+    main()
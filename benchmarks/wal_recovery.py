@@ -0,0 +1,102 @@
+"""
+Write-ahead log benchmark: write throughput with group commit, then
+recovery time of a fresh process from the log alone and from a snapshot.
+
+    python -m benchmarks.wal_recovery [clients] [threads]
+
+The log lives in a temporary WAL_DIR. It is filled with `clients`
+clients (default 100000) through bulk imports, plus one mentorship per
+100 clients. Then 2000 single-client updates run on one thread and on
+`threads` threads (default 16), each update waiting for its fsync.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+RECOVER = """
+import time
+started = time.perf_counter()
+from app import create_app
+create_app(seed=False)
+import models
+print(len(models.clients), len(models.mentorships), time.perf_counter() - started)
+"""
+
+def recover(directory):
+    """
+    Start a fresh interpreter on a copy of the log (this process holds
+    the directory's lock) and time create_app() with recovery
+    """
+    copy = tempfile.mkdtemp(prefix="wal-benchmark-copy-")
+    shutil.copytree(directory, copy, dirs_exist_ok=True)
+    environment = dict(os.environ, WAL_DIR=copy, LOG_LEVEL="WARNING")
+    output = subprocess.run(
+        [sys.executable, "-c", RECOVER], env=environment, capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ).stdout.split()
+    shutil.rmtree(copy)
+    clients, mentorships, elapsed = int(output[0]), int(output[1]), float(output[2])
+    return clients + mentorships, elapsed
+
+def updates(count, threads):
+    from services.client_service import update_client
+
+    def worker(offset):
+        for i in range(offset, count, threads):
+            update_client(i % 1000 + 1, notes=f"Atualização {i}")
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(offset,)) for offset in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return count / (time.perf_counter() - started)
+
+def log_size(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    directory = tempfile.mkdtemp(prefix="wal-benchmark-")
+    os.environ["WAL_DIR"] = directory
+    os.environ["WAL_SNAPSHOT_BYTES"] = str(1 << 40)  # snapshot explicitly below
+
+    from app import create_app
+    create_app(seed=False)
+    from services.client_service import import_clients
+    from services.mentorship_service import create_mentorship
+    from services.wal import get_journal
+
+    started = time.perf_counter()
+    for start in range(0, count, 10000):
+        import_clients([
+            {"name": f"Cliente {i}", "email": f"cliente{i}@example.com", "phone": f"119{i:08d}",
+             "notes": "Prospect gerado a partir de visualizações do YouTube"}
+            for i in range(start, min(start + 10000, count))
+        ])
+    for client_id in range(1, count + 1, 100):
+        create_mentorship(client_id, f"Mentoria {client_id}", "Mentoria em liderança e carreira")
+    print(f"{'load':<28}{time.perf_counter() - started:>10.2f} s")
+
+    for workers in (1, threads):
+        print(f"{f'updates, {workers} thread(s)':<28}{updates(2000, workers):>10.0f} writes/s")
+
+    print(f"{'log size':<28}{log_size(directory) / 1e6:>10.1f} MB")
+    records, elapsed = recover(directory)
+    print(f"{'recover from log':<28}{elapsed:>10.2f} s  ({records} records)")
+
+    started = time.perf_counter()
+    get_journal().snapshot()
+    print(f"{'write snapshot':<28}{time.perf_counter() - started:>10.2f} s")
+    print(f"{'snapshot size':<28}{log_size(directory) / 1e6:>10.1f} MB")
+    records, elapsed = recover(directory)
+    print(f"{'recover from snapshot':<28}{elapsed:>10.2f} s  ({records} records)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import os
+import re
+import sys
+
+import click
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+@click.command("import-profile")
+@click.option("--top", default=25, show_default=True, help="Number of modules to list.")
+@click.option("--sort", "sort_by", type=click.Choice(["cumulative", "self"]), default="cumulative",
+              show_default=True, help="Rank modules by their own or their cumulative import time.")
+@click.option("--blueprints", default=None, help="Comma-separated blueprints to build the app with.")
+def import_profile(top, sort_by, blueprints):
+    """
+    Profile a cold start: import and build the app in a fresh interpreter
+    under `python -X importtime` and list the slowest imports.
+    """
+    import subprocess
+
+    selected = repr(blueprints.split(",")) if blueprints else "None"
+    code = (
+        "import time; started = time.perf_counter(); import app; "
+        f"app.create_app({selected}); print(time.perf_counter() - started)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        raise click.ClickException(result.stderr.strip().splitlines()[-1])
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules.append((int(match.group(1)), int(match.group(2)), match.group(4)))
+
+    index = 0 if sort_by == "self" else 1
+    modules.sort(key=lambda module: module[index], reverse=True)
+    elapsed = float(result.stdout.strip().splitlines()[-1])
+
+    click.echo(f"create_app() cold start: {elapsed * 1000:.1f} ms, {len(modules)} modules imported")
+    click.echo(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for self_us, cumulative_us, name in modules[:top]:
+        click.echo(f"{self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}  {name}")
@@ -1,5 +1,25 @@
 from datetime import datetime
 from enum import Enum
+import json
+import os
+import queue
+import threading
+import time
+
+from models import Record
+from services.repository import create_repository, transaction
+from services.event_broker import chat_events
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, paginate, project
+
+# Chat history is stored in fixed-size segments; service payloads only
+# carry the most recent CHAT_PREVIEW_SIZE messages
+CHAT_SEGMENT_SIZE = 256
+CHAT_PREVIEW_SIZE = 20
+
+# Chat streams send a keepalive every CHAT_KEEPALIVE seconds and close after
+# CHAT_STREAM_DURATION so a worker is never held forever; clients reconnect
+CHAT_KEEPALIVE = 15
+CHAT_STREAM_DURATION = 300
 
 # Client Services statuses
 class ServiceStatus(str, Enum):
@@ -11,20 +31,70 @@ class ServiceStatus(str, Enum):
 
 # Chat message model
 class ChatMessage:
+    __slots__ = ("id", "sender", "message", "timestamp")
+    
     def __init__(self, sender, message, timestamp=None):
+        self.id = None  # sequence number, assigned by the ChatLog
         self.sender = sender  # 'client' or 'mentor'
         self.message = message
         self.timestamp = timestamp or datetime.now()
         
     def to_dict(self):
         return {
+            "id": self.id,
             "sender": self.sender,
             "message": self.message,
-            "timestamp": self.timestamp.isoformat()
+            "timestamp": self.timestamp
         }
 
+# Serializes chat appends so concurrent posts never share a sequence number
+# (module-level rather than per log, since stored services get serialized)
+chat_append_lock = threading.Lock()
+
+# Append-only chat store: messages are numbered 0..n-1 and kept in
+# segments of CHAT_SEGMENT_SIZE, so reading a page touches at most two
+# segments no matter how long the conversation is
+class ChatLog:
+    __slots__ = ("segments", "count")
+    
+    def __init__(self):
+        self.segments = []
+        self.count = 0
+        
+    def append(self, chat_message):
+        with chat_append_lock:
+            if not self.segments or len(self.segments[-1]) == CHAT_SEGMENT_SIZE:
+                self.segments.append([])
+            chat_message.id = self.count
+            self.segments[-1].append(chat_message)
+            self.count += 1
+        return chat_message
+        
+    def __len__(self):
+        return self.count
+        
+    def __iter__(self):
+        for segment in self.segments:
+            yield from segment
+        
+    def since(self, after):
+        """Return every message with a sequence number greater than `after`"""
+        return self.page(before=None, limit=max(0, self.count - after - 1))
+        
+    def page(self, before=None, limit=CHAT_PREVIEW_SIZE):
+        """Return up to `limit` messages preceding sequence number `before`, oldest first"""
+        stop = self.count if before is None else max(0, min(before, self.count))
+        start = max(0, stop - limit)
+        messages = []
+        for sequence in range(start, stop):
+            segment, offset = divmod(sequence, CHAT_SEGMENT_SIZE)
+            messages.append(self.segments[segment][offset])
+        return messages
+
 # Document model
 class Document:
+    __slots__ = ("type", "name", "file_path", "created_at")
+    
     def __init__(self, type, name, file_path=None):
         self.type = type  # 'proposal', 'contract', 'receipt', 'content'
         self.name = name
@@ -36,11 +106,13 @@ class Document:
             "type": self.type,
             "name": self.name,
             "file_path": self.file_path,
-            "created_at": self.created_at.isoformat()
+            "created_at": self.created_at
         }
 
 # Timeline event model
 class TimelineEvent:
+    __slots__ = ("title", "description", "date")
+    
     def __init__(self, title, description, date=None):
         self.title = title
         self.description = description
@@ -50,11 +122,13 @@ class TimelineEvent:
         return {
             "title": self.title,
             "description": self.description,
-            "date": self.date.isoformat()
+            "date": self.date
         }
 
 # Meeting model
 class Meeting:
+    __slots__ = ("date", "topic", "notes")
+    
     def __init__(self, date, topic, notes=None):
         self.date = date
         self.topic = topic
@@ -69,6 +143,8 @@ class Meeting:
 
 # Scope item model
 class ScopeItem:
+    __slots__ = ("title", "description")
+    
     def __init__(self, title, description):
         self.title = title
         self.description = description
@@ -80,63 +156,59 @@ class ScopeItem:
         }
 
 # Client Service model (represents a service contracted by a client)
-class ClientService:
+class ClientService(Record):
+    __slots__ = ("id", "title", "client_id", "description", "status", "meetings", "documents",
+                 "chat_history", "scope", "timeline", "price", "installments", "created_at", "updated_at")
+    
     def __init__(self, title, client_id, status=ServiceStatus.INITIAL_CONTACT, description=""):
-        global next_service_id
-        self.id = next_service_id
-        next_service_id += 1
+        super().__init__()
+        self.id = client_services.allocate_id()
         self.title = title
         self.client_id = client_id
         self.description = description
         self.status = status
         self.meetings = []
         self.documents = []
-        self.chat_history = []
+        self.chat_history = ChatLog()
         self.scope = []
         self.timeline = []
         self.price = ""
         self.installments = 1
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
+        self.created_at = self.updated_at = datetime.now()
+        
+    def touch(self):
+        # Bump version/updated_at and reposition the service in the store's ordered view
+        super().touch()
+        client_services.save(self)
+        
+    def append_to(self, field, item):
+        # Like touch(), but the store appends the item and writes only it
+        super().touch()
+        return client_services.append(self, field, item)
         
     def add_meeting(self, date, topic, notes=None):
-        meeting = Meeting(date, topic, notes)
-        self.meetings.append(meeting)
-        self.updated_at = datetime.now()
-        return meeting
+        return self.append_to("meetings", Meeting(date, topic, notes))
         
     def add_document(self, type, name, file_path=None):
-        document = Document(type, name, file_path)
-        self.documents.append(document)
-        self.updated_at = datetime.now()
-        return document
+        return self.append_to("documents", Document(type, name, file_path))
         
     def add_chat_message(self, sender, message):
-        chat_message = ChatMessage(sender, message)
-        self.chat_history.append(chat_message)
-        self.updated_at = datetime.now()
-        return chat_message
+        return self.append_to("chat_history", ChatMessage(sender, message))
         
     def add_scope_item(self, title, description):
-        scope_item = ScopeItem(title, description)
-        self.scope.append(scope_item)
-        self.updated_at = datetime.now()
-        return scope_item
+        return self.append_to("scope", ScopeItem(title, description))
         
     def add_timeline_event(self, title, description, date=None):
-        event = TimelineEvent(title, description, date)
-        self.timeline.append(event)
-        self.updated_at = datetime.now()
-        return event
+        return self.append_to("timeline", TimelineEvent(title, description, date))
         
     def set_price(self, price, installments=1):
         self.price = price
         self.installments = installments
-        self.updated_at = datetime.now()
+        self.touch()
         
     def update_status(self, status):
         self.status = status
-        self.updated_at = datetime.now()
+        self.touch()
         
         # Add timeline event for status change
         status_descriptions = {
@@ -150,7 +222,7 @@ class ClientService:
         description = status_descriptions.get(status, f"Status atualizado para {status}")
         self.add_timeline_event(f"Status: {status}", description)
         
-    def to_dict(self):
+    def build_dict(self):
         return {
             "id": self.id,
             "title": self.title,
@@ -159,29 +231,31 @@ class ClientService:
             "status": self.status,
             "meetings": [meeting.to_dict() for meeting in self.meetings],
             "documents": [document.to_dict() for document in self.documents],
-            "chat_history": [message.to_dict() for message in self.chat_history],
+            "chat_history": [message.to_dict() for message in self.chat_history.page()],
+            "chat_count": len(self.chat_history),
             "scope": [item.to_dict() for item in self.scope],
             "timeline": [event.to_dict() for event in self.timeline],
             "price": self.price,
             "installments": self.installments,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat()
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
         }
 
 # Podcast Episode model
-class PodcastEpisode:
+class PodcastEpisode(Record):
+    __slots__ = ("id", "title", "description", "date", "youtube_link", "summary", "created_at", "updated_at")
+    
     def __init__(self, title, description, date, youtube_link, summary=""):
-        global next_episode_id
-        self.id = next_episode_id
-        next_episode_id += 1
+        super().__init__()
+        self.id = podcast_episodes.allocate_id()
         self.title = title
         self.description = description
         self.date = date
         self.youtube_link = youtube_link
         self.summary = summary
-        self.created_at = datetime.now()
+        self.created_at = self.updated_at = datetime.now()
         
-    def to_dict(self):
+    def build_dict(self):
         return {
             "id": self.id,
             "title": self.title,
@@ -189,102 +263,92 @@ class PodcastEpisode:
             "date": self.date,
             "youtube_link": self.youtube_link,
             "summary": self.summary,
-            "created_at": self.created_at.isoformat()
+            "created_at": self.created_at
         }
 
-# In-memory storage
-client_services = {}
-podcast_episodes = {}
-
-# ID counters
-next_service_id = 1
-next_episode_id = 1
-
-# Initialize sample data
-def initialize_client_portal_data():
-    # Add podcast episodes
-    add_podcast_episode(
-        "Minha jornada em RH - Com Patricia Rocha",
-        "Patricia Rocha compartilha sua trajetória no mundo de Recursos Humanos e insights valiosos sobre o desenvolvimento deste campo ao longo dos anos.",
-        "2025-04-15",
-        "https://www.youtube.com/@anaconecta",
-        "Neste episódio, Patricia Rocha, experiente profissional de RH, compartilha sua jornada de mais de 20 anos na área. Ela aborda temas como a evolução das práticas de RH, a importância do desenvolvimento humano nas organizações e como o papel de RH passou de administrativo para estratégico. Patricia também oferece conselhos valiosos para novos profissionais que desejam ingressar na área."
-    )
+# Storage: in memory unless DATABASE_URL selects the SQL backend
+client_services = create_repository(
+    "client_services", ClientService,
+    order=lambda service: service.updated_at.isoformat(), order_type=str, reverse=True,
+    collections={
+        "meetings": (list, Meeting),
+        "documents": (list, Document),
+        "chat_history": (ChatLog, ChatMessage),
+        "scope": (list, ScopeItem),
+        "timeline": (list, TimelineEvent)
+    },
+    client_id=int
+)
+podcast_episodes = create_repository(
+    "podcast_episodes", PodcastEpisode,
+    order=lambda episode: episode.date, order_type=str, reverse=True
+)
+
+# Fixture file with the portal's sample podcast episodes and services
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "client_portal.json")
+
+# Seed the portal stores from the fixture file. Runs once at app creation;
+# it is idempotent, so calling it again never duplicates records, even from
+# several workers starting together on one database
+def initialize_client_portal_data(path=FIXTURES_PATH):
+    if len(podcast_episodes) > 0 or len(client_services) > 0:
+        return False
     
-    add_podcast_episode(
-        "Uma Ponte para Você - Com Nivea Oliveira",
-        "Uma conversa inspiradora sobre transições de carreira e a importância de construir pontes para novos caminhos profissionais.",
-        "2025-03-28",
-        "https://www.youtube.com/@anaconecta",
-        "Nivea Oliveira, especialista em transição de carreira, compartilha sua metodologia 'Uma Ponte para Você', que ajuda profissionais a navegarem com sucesso por mudanças em suas trajetórias. Ela discute a importância do autoconhecimento, da identificação de competências transferíveis e do networking estratégico. O episódio traz exemplos reais de pessoas que reinventaram suas carreiras e estratégias práticas para quem está considerando uma mudança profissional."
-    )
+    with open(path, encoding="utf-8") as fixture_file:
+        fixtures = json.load(fixture_file)
     
-    add_podcast_episode(
-        "Até onde as conexões podem nos levar? - Com Janine Alcure e Andréia Xavier",
-        "Uma análise do poder das conexões genuínas e como elas podem transformar carreiras e negócios.",
-        "2025-03-10",
-        "https://www.youtube.com/@anaconecta",
-        "Janine Alcure e Andréia Xavier, especialistas em networking estratégico, discutem como construir e manter conexões profissionais significativas. Elas abordam a diferença entre networking quantitativo e qualitativo, técnicas para estabelecer relações autênticas e como aproveitar as conexões de forma ética e mutuamente benéfica. O episódio também explora como as redes sociais transformaram o networking e estratégias para se destacar no ambiente digital."
-    )
+    with transaction(podcast_episodes, client_services):
+        # Another worker may have seeded since the check above: re-check
+        # once no other writer can get in
+        podcast_episodes.lock_writes()
+        client_services.lock_writes()
+        if len(podcast_episodes) > 0 or len(client_services) > 0:
+            return False
+        seed_client_portal(fixtures)
+    return True
+
+# Write the fixture records (call it inside a transaction, as above)
+def seed_client_portal(fixtures):
+    for episode in fixtures.get("podcast_episodes", []):
+        add_podcast_episode(**episode)
     
-    # Add a client service example
-    if len(client_services) == 0 and len(podcast_episodes) > 0:
+    for data in fixtures.get("client_services", []):
         service = add_client_service(
-            "Mentoria em Liderança",
-            1,  # Client ID
-            ServiceStatus.IN_PROGRESS,
-            "Programa de mentoria focado em desenvolvimento de habilidades de liderança."
+            data["title"],
+            data["client_id"],
+            ServiceStatus(data.get("status", ServiceStatus.INITIAL_CONTACT)),
+            data.get("description", "")
         )
         
-        # Add scope items
-        service.add_scope_item(
-            "Avaliação de Perfil de Liderança", 
-            "Diagnóstico do perfil de liderança atual e identificação de pontos fortes e áreas de desenvolvimento."
-        )
-        service.add_scope_item(
-            "Desenvolvimento de Habilidades", 
-            "Sessões focadas em comunicação, delegação, feedback, gerenciamento de conflitos e desenvolvimento de equipes."
-        )
-        service.add_scope_item(
-            "Plano de Ação Individual", 
-            "Elaboração de plano de desenvolvimento individual com metas e ações específicas."
-        )
-        
-        # Add meetings
-        service.add_meeting("2025-05-10", "Introdução e Definição de Objetivos")
-        service.add_meeting("2025-05-17", "Estilos de Liderança e Autoconhecimento")
+        for item in data.get("scope", []):
+            service.add_scope_item(item["title"], item["description"])
+        for meeting in data.get("meetings", []):
+            service.add_meeting(meeting["date"], meeting["topic"], meeting.get("notes"))
+        for document in data.get("documents", []):
+            service.add_document(document["type"], document["name"], document.get("file_path"))
+        for chat_message in data.get("chat_history", []):
+            service.add_chat_message(chat_message["sender"], chat_message["message"])
+        for event in data.get("timeline", []):
+            service.add_timeline_event(event["title"], event["description"], datetime.fromisoformat(event["date"]))
         
-        # Add documents
-        service.add_document("proposal", "Proposta_Mentoria_Lideranca.pdf")
-        service.add_document("contract", "Contrato_Mentoria_Lideranca.pdf")
-        
-        # Add chat history
-        service.add_chat_message("client", "Olá Ana, gostaria de mais informações sobre o programa de mentoria em liderança.")
-        service.add_chat_message("mentor", "Olá! Claro, o programa de mentoria em liderança é personalizado para suas necessidades específicas. Podemos agendar uma conversa inicial para entender melhor seus objetivos?")
-        service.add_chat_message("client", "Seria ótimo! Tenho disponibilidade na próxima semana.")
-        service.add_chat_message("mentor", "Perfeito! Podemos marcar para segunda-feira às 14h?")
-        service.add_chat_message("client", "Confirmado, estarei disponível nesse horário.")
-        
-        # Add timeline events
-        service.add_timeline_event("Solicitação de Serviço", "Solicitação inicial de mentoria em liderança.", datetime.fromisoformat("2025-05-05T10:00:00"))
-        service.add_timeline_event("Proposta Enviada", "Proposta personalizada enviada para aprovação.", datetime.fromisoformat("2025-05-07T15:30:00"))
-        service.add_timeline_event("Contrato Assinado", "Contrato assinado e primeira sessão agendada.", datetime.fromisoformat("2025-05-09T11:45:00"))
-        
-        # Set price
-        service.set_price("R$ 1.800,00", 3)
+        if "price" in data:
+            service.set_price(data["price"], data.get("installments", 1))
 
 # Function to add a new podcast episode
 def add_podcast_episode(title, description, date, youtube_link, summary=""):
     episode = PodcastEpisode(title, description, date, youtube_link, summary)
-    podcast_episodes[episode.id] = episode
+    podcast_episodes.add(episode)
     return episode.to_dict()
 
 # Function to get all podcast episodes
-def get_all_podcast_episodes():
-    episodes = [episode.to_dict() for episode in podcast_episodes.values()]
-    # Sort by date (newest first)
-    episodes.sort(key=lambda x: x["date"], reverse=True)
-    return episodes
+def get_all_podcast_episodes(fields=None):
+    # The store is kept sorted by date (newest first)
+    return [project(episode.to_dict(), fields) for episode in podcast_episodes.select()]
+
+# Function to get one page of podcast episodes
+def get_podcast_episodes_page(limit=DEFAULT_PAGE_SIZE, cursor=None, fields=None):
+    selected = podcast_episodes.select(after=decode_cursor(cursor, podcast_episodes))
+    return paginate(podcast_episodes, selected, PodcastEpisode.to_dict, limit, fields)
 
 # Function to get a podcast episode by ID
 def get_podcast_episode(episode_id):
@@ -293,22 +357,39 @@ def get_podcast_episode(episode_id):
         return episode.to_dict()
     return None
 
+# Function to get a podcast episode by ID as cached JSON bytes
+def get_podcast_episode_json(episode_id):
+    episode = podcast_episodes.get(episode_id)
+    if episode:
+        return episode.to_json()
+    return None
+
 # Function to add a new client service
 def add_client_service(title, client_id, status=ServiceStatus.INITIAL_CONTACT, description=""):
     service = ClientService(title, client_id, status, description)
-    client_services[service.id] = service
+    client_services.add(service)
     return service
 
 # Function to get all client services
-def get_all_client_services(client_id=None):
-    if client_id:
-        services = [service.to_dict() for service in client_services.values() if service.client_id == client_id]
-    else:
-        services = [service.to_dict() for service in client_services.values()]
-    
-    # Sort by updated_at (newest first)
-    services.sort(key=lambda x: x["updated_at"], reverse=True)
-    return services
+def get_all_client_services(client_id=None, fields=None):
+    # The store is kept sorted by updated_at (newest first)
+    selected = client_services.select(client_id=client_id or None)
+    return [project(service.to_dict(), fields) for service in selected]
+
+# Function to get one page of client services
+def get_client_services_page(client_id=None, limit=DEFAULT_PAGE_SIZE, cursor=None, fields=None):
+    selected = client_services.select(after=decode_cursor(cursor, client_services), client_id=client_id or None)
+    return paginate(client_services, selected, ClientService.to_dict, limit, fields)
+
+# Function to walk client services lazily, optionally filtered by client,
+# status and last update. The store is newest first, so the walk stops at
+# the first service not updated since `since`
+def iter_client_services(client_id=None, status_filter=None, since=None):
+    for service in client_services.select(client_id=client_id or None):
+        if since is not None and service.updated_at < since:
+            return
+        if status_filter is None or service.status == status_filter:
+            yield service
 
 # Function to get a client service by ID
 def get_client_service(service_id):
@@ -317,6 +398,13 @@ def get_client_service(service_id):
         return service.to_dict()
     return None
 
+# Function to get a client service by ID as cached JSON bytes
+def get_client_service_json(service_id):
+    service = client_services.get(service_id)
+    if service:
+        return service.to_json()
+    return None
+
 # Function to update a client service
 def update_client_service(service_id, update_data):
     service = client_services.get(service_id)
@@ -335,7 +423,7 @@ def update_client_service(service_id, update_data):
     if 'price' in update_data and 'installments' in update_data:
         service.set_price(update_data['price'], update_data['installments'])
     
-    service.updated_at = datetime.now()
+    service.touch()
     return service.to_dict()
 
 # Function to add a chat message to a service
@@ -345,7 +433,57 @@ def add_chat_message_to_service(service_id, sender, message):
         return None
     
     chat_message = service.add_chat_message(sender, message)
-    return chat_message.to_dict()
+    message_dict = chat_message.to_dict()
+    chat_events.publish(service_id, message_dict)
+    return message_dict
+
+# Function to follow a service's chat: yields new message dicts as they are
+# posted (after replaying those past sequence `after`), and None as keepalive
+def stream_chat_messages(service_id, after=None):
+    service = client_services.get(service_id)
+    if not service:
+        return
+    
+    subscriber = chat_events.subscribe(service_id)
+    try:
+        last_id = -1 if after is None else after
+        if after is not None:
+            for chat_message in service.chat_history.since(after):
+                last_id = chat_message.id
+                yield chat_message.to_dict()
+        
+        deadline = time.monotonic() + CHAT_STREAM_DURATION
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                message_dict = subscriber.get(timeout=min(CHAT_KEEPALIVE, remaining))
+            except queue.Empty:
+                yield None
+                continue
+            if message_dict is None:
+                return
+            # Skip messages already sent during the replay
+            if message_dict["id"] > last_id:
+                last_id = message_dict["id"]
+                yield message_dict
+    finally:
+        chat_events.unsubscribe(service_id, subscriber)
+
+# Function to get a page of a service's chat history, oldest message first
+def get_chat_messages(service_id, before=None, limit=DEFAULT_PAGE_SIZE):
+    service = client_services.get(service_id)
+    if not service:
+        return None
+    
+    limit = min(max(int(limit), 1), MAX_PAGE_SIZE)
+    messages = service.chat_history.page(before, limit)
+    return {
+        "messages": [chat_message.to_dict() for chat_message in messages],
+        "count": len(service.chat_history),
+        "next_before": messages[0].id if messages and messages[0].id > 0 else None
+    }
 
 # Function to add a document to a service
 def add_document_to_service(service_id, type, name, file_path=None):
@@ -376,7 +514,4 @@ def add_scope_item_to_service(service_id, title, description):
 
 # Function to delete a client service
 def delete_client_service(service_id):
-    if service_id in client_services:
-        del client_services[service_id]
-        return True
-    return False
\ No newline at end of file
+    return client_services.delete(service_id)
\ No newline at end of file
@@ -0,0 +1,93 @@
+from flask import request, jsonify, url_for, Response, stream_with_context, send_file, Blueprint
+import logging
+
+from services.export_service import build_export, submit_export
+from services.jobs import jobs
+
+bp = Blueprint('exports', __name__)
+
+def request_options():
+    """The request's JSON object body ({} when empty); ValueError when malformed"""
+    if not request.get_data():
+        return {}
+    options = request.get_json(silent=True)
+    if not isinstance(options, dict):
+        raise ValueError("Request body must be a JSON object")
+    return options
+
+# Export API Routes
+@bp.route('/api/export/<export_name>', methods=['POST'])
+def export_api(export_name):
+    """
+    Export clients, mentorships, financial or analytics data as csv, json,
+    ndjson or xlsx. Small exports stream straight into the response; large
+    ones (or `background: true`) run as a job and return 202 with its id.
+    """
+    try:
+        try:
+            options = request_options()
+            export = build_export(export_name, options)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if export.should_run_in_background(bool(options.get('background'))):
+            return job_response(submit_export(export), 202)
+        
+        # Rows are produced lazily while the response is being sent
+        response = Response(stream_with_context(export.stream()), content_type=export.content_type)
+        response.headers['Content-Disposition'] = f'attachment; filename={export.filename}'
+        return response
+            
+    except Exception as e:
+        logging.error(f"Error exporting {export_name}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+# Background Job API Routes
+def job_response(job, status=200):
+    body = job.to_dict()
+    body['status_url'] = url_for('.job_status', job_id=job.id)
+    body['result_url'] = url_for('.job_result', job_id=job.id)
+    return jsonify(body), status
+
+@bp.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Submit a background job, e.g. {"kind": "export", "export": "clients", "format": "xlsx"}"""
+    try:
+        try:
+            options = request_options()
+            job = jobs.submit_request(options.get('kind'), options)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return job_response(job, 202)
+    except Exception as e:
+        logging.error(f"Error submitting job: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """Cheap status poll: one row lookup, with progress and total"""
+    try:
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return job_response(job)
+    except Exception as e:
+        logging.error(f"Error getting job {job_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/jobs/<job_id>/result')
+def job_result(job_id):
+    try:
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.status != 'done':
+            return job_response(job, 409)
+        
+        if isinstance(job.result, dict) and 'path' in job.result:
+            return send_file(job.result['path'], mimetype=job.result['content_type'],
+                             as_attachment=True, download_name=job.result['filename'])
+        return jsonify(job.result)
+    except Exception as e:
+        logging.error(f"Error getting result of job {job_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
@@ -1,4 +1,10 @@
-from app import app
+import os
+
+from app import create_app
+
+app = create_app()
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    # The reloader's parent would also open the write-ahead log, which
+    # only one process may hold
+    app.run(host="0.0.0.0", port=5000, debug=True, use_reloader=not os.environ.get("WAL_DIR"))
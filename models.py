@@ -1,10 +1,84 @@
 from datetime import datetime
 from enum import Enum
+import itertools
+import re
 
-# In-memory database using dictionaries
-clients = {}
-initiatives = {}
-mentorships = {}
+from services import json_codec
+from services.repository import create_repository
+
+# Record versions come from one process-wide counter: next() is atomic, so
+# concurrent touches never lose an increment and versions only grow
+record_versions = itertools.count(1)
+
+def resume_record_versions(stores):
+    """Continue the version counter past the versions of restored records"""
+    global record_versions
+    latest = max((record.version for store in stores for record in store.values()), default=0)
+    record_versions = itertools.count(latest + 1)
+
+def normalize_email(email):
+    """Case- and whitespace-insensitive form of an email, used as its identity"""
+    return (email or "").strip().casefold()
+
+NON_DIGITS = re.compile(r"\D")
+
+def normalize_phone(phone):
+    """Digits-only form of a phone number, as whatsapp_integration.js sends it"""
+    return NON_DIGITS.sub("", str(phone or ""))
+
+class Record:
+    """
+    Base for stored models: a version counter bumped by touch() and a
+    serialization cache that is rebuilt only when the version changes.
+    Models declare __slots__ so records carry no per-instance __dict__.
+    """
+    __slots__ = ("version", "_dict_cache", "_json_cache")
+
+    def __init__(self):
+        self.version = 0
+        self._dict_cache = None
+        self._json_cache = None
+
+    def touch(self):
+        """Mark the record as changed after its attributes were mutated"""
+        self.updated_at = datetime.now()
+        self.version = next(record_versions)
+
+    def build_dict(self):
+        raise NotImplementedError
+
+    def __getstate__(self):
+        # Serialization caches are not part of the stored state
+        state = {}
+        for cls in type(self).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                if not name.startswith("_") and hasattr(self, name):
+                    state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state):
+        Record.__init__(self)
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def to_dict(self):
+        # Read the version before building: a touch() racing with the build
+        # then leaves the cache already stale instead of wrongly current
+        version = self.version
+        cached = self._dict_cache
+        if cached is None or cached[0] != version:
+            cached = self._dict_cache = (version, self.build_dict())
+        # Callers may add keys (e.g. client_name), so hand out a shallow copy
+        return dict(cached[1])
+
+    def to_json(self):
+        """Return the record encoded as UTF-8 JSON bytes, cached per version"""
+        version = self.version
+        cached = self._json_cache
+        if cached is None or cached[0] != version:
+            body = json_codec.dumps(self.to_dict())
+            cached = self._json_cache = (version, body)
+        return cached[1]
 
 # Categories for initiatives
 initiative_categories = [
@@ -17,11 +91,6 @@ initiative_categories = [
     "Outros"
 ]
 
-# Next IDs for auto-increment
-next_client_id = 1
-next_initiative_id = 1
-next_mentorship_id = 1
-
 # Enums for status
 class ClientStatus(str, Enum):
     PROSPECT = "prospect"
@@ -41,20 +110,30 @@ class MentorshipStatus(str, Enum):
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
 
-class Client:
-    def __init__(self, name, email, phone, status=ClientStatus.PROSPECT, notes=""):
-        global next_client_id
-        self.id = next_client_id
-        next_client_id += 1
+class Client(Record):
+    __slots__ = ("id", "name", "email", "phone", "status", "notes", "created_at", "updated_at")
+
+    def __init__(self, name, email, phone, status=ClientStatus.PROSPECT, notes="", id=None):
+        super().__init__()
+        # Bulk imports hand in ids reserved up front with allocate_ids()
+        self.id = clients.allocate_id() if id is None else id
         self.name = name
         self.email = email
         self.phone = phone
         self.status = status
         self.notes = notes
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
+        self.created_at = self.updated_at = datetime.now()
 
-    def to_dict(self):
+    # Normalized contacts the clients store keeps unique (None when blank)
+    @property
+    def email_key(self):
+        return normalize_email(self.email) or None
+
+    @property
+    def phone_key(self):
+        return normalize_phone(self.phone) or None
+
+    def build_dict(self):
         return {
             "id": self.id,
             "name": self.name,
@@ -62,24 +141,24 @@ class Client:
             "phone": self.phone,
             "status": self.status,
             "notes": self.notes,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat()
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
         }
 
-class Initiative:
+class Initiative(Record):
+    __slots__ = ("id", "title", "description", "category", "status", "priority", "created_at", "updated_at")
+
     def __init__(self, title, description, category, status=InitiativeStatus.PENDING, priority=3):
-        global next_initiative_id
-        self.id = next_initiative_id
-        next_initiative_id += 1
+        super().__init__()
+        self.id = initiatives.allocate_id()
         self.title = title
         self.description = description
         self.category = category
         self.status = status
         self.priority = priority  # 1-5, with 1 being highest
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
+        self.created_at = self.updated_at = datetime.now()
 
-    def to_dict(self):
+    def build_dict(self):
         return {
             "id": self.id,
             "title": self.title,
@@ -87,25 +166,26 @@ class Initiative:
             "category": self.category,
             "status": self.status,
             "priority": self.priority,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat()
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
         }
 
-class Mentorship:
+class Mentorship(Record):
+    __slots__ = ("id", "client_id", "title", "description", "status", "meetings", "documents",
+                 "created_at", "updated_at")
+
     def __init__(self, client_id, title, description, status=MentorshipStatus.INITIAL_CONTACT):
-        global next_mentorship_id
-        self.id = next_mentorship_id
-        next_mentorship_id += 1
+        super().__init__()
+        self.id = mentorships.allocate_id()
         self.client_id = client_id
         self.title = title
         self.description = description
         self.status = status
         self.meetings = []
         self.documents = []
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
+        self.created_at = self.updated_at = datetime.now()
 
-    def to_dict(self):
+    def build_dict(self):
         return {
             "id": self.id,
             "client_id": self.client_id,
@@ -114,10 +194,23 @@ class Mentorship:
             "status": self.status,
             "meetings": self.meetings,
             "documents": self.documents,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat()
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
         }
 
+# Stores: indexed and kept sorted, in memory unless DATABASE_URL selects SQL
+clients = create_repository("clients", Client, status=str, unique={"email_key": str, "phone_key": str})
+initiatives = create_repository(
+    "initiatives", Initiative,
+    order=lambda initiative: initiative.priority, order_type=int,
+    status=str, category=str
+)
+mentorships = create_repository(
+    "mentorships", Mentorship,
+    order=lambda mentorship: mentorship.created_at.isoformat(), order_type=str, reverse=True,
+    status=str, client_id=int
+)
+
 def initialize_db():
     """Initialize the in-memory database with sample data"""
     # Sample data will be initialized here if needed
@@ -1,7 +1,10 @@
-from flask import render_template, request, jsonify, redirect, url_for, flash
-from app import app
+from flask import (
+    render_template, request, jsonify, redirect, url_for, flash, Response, stream_with_context,
+    make_response, Blueprint, current_app
+)
 import json
 import logging
+import zlib
 from datetime import datetime
 
 from models import Client, Initiative, Mentorship
@@ -9,106 +12,213 @@ from models import ClientStatus, InitiativeStatus, MentorshipStatus
 from models import clients, initiatives, mentorships, initiative_categories
 
 from services.client_service import (
-    get_all_clients, get_client_by_id, create_client, 
-    update_client, delete_client
+    get_all_clients, get_clients_page, get_client_by_id, get_client_json, create_client, 
+    update_client, delete_client, import_clients, find_client, MAX_BULK_ROWS, CONTACT_FIELDS
 )
 from services.initiative_service import (
-    get_all_initiatives, get_initiative_by_id, create_initiative,
-    update_initiative, delete_initiative
+    get_all_initiatives, get_initiatives_page, get_initiative_by_id, get_initiative_json, create_initiative,
+    update_initiative, update_initiatives, delete_initiative
 )
 from services.mentorship_service import (
-    get_all_mentorships, get_mentorship_by_id, create_mentorship,
-    update_mentorship, delete_mentorship
+    get_all_mentorships, get_mentorships_page, get_mentorship_by_id, create_mentorship,
+    update_mentorship, update_mentorships, delete_mentorship
 )
+from services.stats_service import get_stats
+from services.search_service import search
+from services.pagination import DEFAULT_PAGE_SIZE, parse_fields
+from services.batch import BatchError
+from services.repository import UniqueViolation
+from services import json_codec
 
 # Import client portal module
 import client_portal
 from client_portal import ServiceStatus
 
+bp = Blueprint('main', __name__)
+
+def json_response(body):
+    """Send JSON bytes that were already encoded (and cached) by the model"""
+    return Response(body, mimetype='application/json')
+
+def collection_etag(*tables):
+    """
+    Validator for a read over whole stores: their write counters plus the
+    exact path and query string, so no record is touched to compute it
+    """
+    versions = ".".join(f"{table.etag_prefix}{table.version}" for table in tables)
+    return f"{versions}-{zlib.crc32(request.full_path.encode('utf-8')):08x}"
+
+def record_etag(table, record_id):
+    """Validator for one record: its version, or None when it doesn't exist"""
+    version = table.version_of(record_id)
+    if version is None:
+        return None
+    return f"{table.etag_prefix}{version}-{record_id}"
+
+def conditional(etag, build):
+    """
+    Answer 304 when the client already holds `etag`; otherwise build() the
+    response and tag it. Clients are asked to revalidate on every use.
+    """
+    if etag is not None and request.if_none_match.contains_weak(etag):
+        # Typed like the 200 it stands for, so compression sets the same headers
+        response = Response(status=304, mimetype='application/json')
+    else:
+        response = make_response(build())
+        if response.status_code != 200 or etag is None:
+            return response
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def list_response(get_all, get_page, **filters):
+    """
+    Serve a list route: the full list by default, or one page when the
+    request carries `limit` or `cursor`. `fields` projects either form.
+    """
+    fields = parse_fields(request.args.get('fields'))
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        return jsonify(get_all(fields=fields, **filters))
+    
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    try:
+        page = get_page(limit=limit, cursor=request.args.get('cursor'), fields=fields, **filters)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(page)
+
 # Main routes
-@app.route('/')
+@bp.route('/')
 def index():
     """Página inicial pública focada no cliente"""
     return render_template('public_home.html')
     
-@app.route('/admin')
+@bp.route('/admin')
 def admin_dashboard():
     """Dashboard administrativo - Acesso exclusivo para Ana Rosa"""
-    # Calcular estatísticas do dashboard
-    clients = get_all_clients()
-    mentorships = get_all_mentorships()
-    initiatives = get_all_initiatives()
+    # Estatísticas do dashboard a partir dos contadores mantidos pelos serviços
+    counts = get_stats()
     
     stats = {
-        'total_clients': len(clients),
-        'prospect_clients': len([c for c in clients if c.status == 'prospect']),
-        'active_clients': len([c for c in clients if c.status == 'active']),
-        'total_mentorships': len(mentorships),
-        'active_mentorships': len([m for m in mentorships if m.status == 'in_progress']),
-        'total_initiatives': len(initiatives),
-        'pending_initiatives': len([i for i in initiatives if i.status == 'pending'])
+        'total_clients': counts['clients']['total'],
+        'prospect_clients': counts['clients']['by_status']['prospect'],
+        'active_clients': counts['clients']['by_status']['active'],
+        'total_mentorships': counts['mentorships']['total'],
+        'active_mentorships': counts['mentorships']['by_status']['in_progress'],
+        'total_initiatives': counts['initiatives']['total'],
+        'pending_initiatives': counts['initiatives']['by_status']['pending']
     }
     
     return render_template('admin_dashboard.html', stats=stats)
     
+@bp.route('/api/stats', methods=['GET'])
+def get_stats_api():
+    try:
+        return conditional(collection_etag(clients, initiatives, mentorships), lambda: jsonify(get_stats()))
+    except Exception as e:
+        logging.error(f"Error getting stats: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+    
+@bp.route('/api/search', methods=['GET'])
+def search_api():
+    """Ranked, accent-insensitive search: /api/search?q=lideranca&types=podcasts,clients"""
+    try:
+        try:
+            limit = int(request.args.get('limit', 20))
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        try:
+            result = search(request.args.get('q', ''), parse_fields(request.args.get('types')), limit)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(result)
+    except Exception as e:
+        logging.error(f"Error searching: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+    
 # Client Portal routes
-@app.route('/services')
+@bp.route('/services')
 def services():
     """Página de serviços oferecidos - para captação de clientes"""
     return render_template('services.html')
     
-@app.route('/contact')
+@bp.route('/contact')
 def contact():
     """Página de contato - para prospecção de clientes"""
     return render_template('contact.html')
 
-@app.route('/portal')
-def client_portal():
+@bp.route('/portal', endpoint='client_portal')
+def client_portal_page():
     """Portal do cliente - para gerenciamento de serviços contratados"""
-    # Inicializa dados do portal do cliente se necessário
+    # Os dados de exemplo do portal são carregados uma única vez na criação do app
     try:
-        if hasattr(client_portal, 'initialize_client_portal_data'):
-            client_portal.initialize_client_portal_data()
         return render_template('client_portal.html')
     except Exception as e:
-        app.logger.error(f"Erro ao carregar portal do cliente: {str(e)}")
+        current_app.logger.error(f"Erro ao carregar portal do cliente: {str(e)}")
         return render_template('error.html', error=str(e))
 
-@app.route('/youtube-prospects')
+@bp.route('/youtube-prospects')
 def youtube_prospects():
     """Página para gerar prospects a partir de visualizações do YouTube"""
     return render_template('youtube_prospects.html')
 
-@app.route('/institutional')
+@bp.route('/institutional')
 def institutional():
     """Página institucional com conteúdos e mídia"""
     return render_template('institutional.html')
 
-@app.route('/api/client-portal/services', methods=['GET'])
+@bp.route('/api/client-portal/services', methods=['GET'])
 def get_client_portal_services():
     try:
         client_id = request.args.get('client_id')
         if client_id:
             client_id = int(client_id)
         
-        services = client_portal.get_all_client_services(client_id)
-        return jsonify(services)
+        return conditional(collection_etag(client_portal.client_services), lambda: list_response(
+            client_portal.get_all_client_services,
+            client_portal.get_client_services_page,
+            client_id=client_id
+        ))
     except Exception as e:
         logging.error(f"Error getting client services: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/client-portal/services/<int:service_id>', methods=['GET'])
+@bp.route('/api/client-portal/services/<int:service_id>', methods=['GET'])
 def get_client_portal_service(service_id):
     try:
-        service = client_portal.get_client_service(service_id)
-        if service:
-            return jsonify(service)
-        return jsonify({"error": "Service not found"}), 404
+        etag = record_etag(client_portal.client_services, service_id)
+        if etag is None:
+            return jsonify({"error": "Service not found"}), 404
+        return conditional(etag, lambda: json_response(client_portal.get_client_service_json(service_id)))
     except Exception as e:
         logging.error(f"Error getting service {service_id}: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/client-portal/services/<int:service_id>/chat', methods=['POST'])
+@bp.route('/api/client-portal/services/<int:service_id>/chat', methods=['GET'])
+def get_chat_messages(service_id):
+    try:
+        before = request.args.get('before')
+        limit = request.args.get('limit', DEFAULT_PAGE_SIZE)
+        try:
+            before = int(before) if before else None
+            limit = int(limit)
+        except ValueError:
+            return jsonify({"error": "before and limit must be integers"}), 400
+        
+        etag = record_etag(client_portal.client_services, service_id)
+        if etag is None:
+            return jsonify({"error": "Service not found"}), 404
+        # Every chat append touches the service, bumping its version
+        etag = f"{etag}-{zlib.crc32(request.full_path.encode('utf-8')):08x}"
+        return conditional(etag, lambda: jsonify(client_portal.get_chat_messages(service_id, before, limit)))
+    except Exception as e:
+        logging.error(f"Error getting chat messages for service {service_id}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/client-portal/services/<int:service_id>/chat', methods=['POST'])
 def add_chat_message(service_id):
     try:
         data = request.json
@@ -126,53 +236,106 @@ def add_chat_message(service_id):
         logging.error(f"Error adding chat message to service {service_id}: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/client-portal/podcasts', methods=['GET'])
+@bp.route('/api/client-portal/services/<int:service_id>/chat/stream', methods=['GET'])
+def stream_chat(service_id):
+    """
+    Server-Sent Events stream of new chat messages for a service.
+    Long-lived: run under gunicorn with --threads or a gevent worker.
+    """
+    if client_portal.get_client_service_json(service_id) is None:
+        return jsonify({"error": "Service not found"}), 404
+    
+    # EventSource resends the last seen id on reconnect
+    after = request.headers.get('Last-Event-ID') or request.args.get('after')
+    try:
+        after = int(after) if after else None
+    except ValueError:
+        return jsonify({"error": "Invalid Last-Event-ID"}), 400
+    
+    def events():
+        yield "retry: 3000\n\n"
+        for message in client_portal.stream_chat_messages(service_id, after):
+            if message is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"id: {message['id']}\ndata: {json_codec.dumps(message).decode('utf-8')}\n\n"
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@bp.route('/api/client-portal/podcasts', methods=['GET'])
 def get_podcasts():
     try:
-        podcasts = client_portal.get_all_podcast_episodes()
-        return jsonify(podcasts)
+        return conditional(collection_etag(client_portal.podcast_episodes), lambda: list_response(
+            client_portal.get_all_podcast_episodes,
+            client_portal.get_podcast_episodes_page
+        ))
     except Exception as e:
         logging.error(f"Error getting podcasts: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/client-portal/podcasts/<int:episode_id>', methods=['GET'])
+@bp.route('/api/client-portal/podcasts/<int:episode_id>', methods=['GET'])
 def get_podcast(episode_id):
     try:
-        episode = client_portal.get_podcast_episode(episode_id)
-        if episode:
-            return jsonify(episode)
-        return jsonify({"error": "Podcast episode not found"}), 404
+        etag = record_etag(client_portal.podcast_episodes, episode_id)
+        if etag is None:
+            return jsonify({"error": "Podcast episode not found"}), 404
+        return conditional(etag, lambda: json_response(client_portal.get_podcast_episode_json(episode_id)))
     except Exception as e:
         logging.error(f"Error getting podcast episode {episode_id}: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 # Client routes
-@app.route('/clients')
+@bp.route('/clients')
 def client_page():
     return render_template('clients.html')
 
-@app.route('/api/clients', methods=['GET'])
+@bp.route('/api/clients', methods=['GET'])
 def get_clients():
     try:
         status_filter = request.args.get('status')
-        all_clients = get_all_clients(status_filter)
-        return jsonify(all_clients)
+        return conditional(collection_etag(clients), lambda: list_response(
+            get_all_clients, get_clients_page, status_filter=status_filter
+        ))
     except Exception as e:
         logging.error(f"Error getting clients: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/clients/<int:client_id>', methods=['GET'])
-def get_client(client_id):
+def contact_taken(e):
+    """409 response for a write clashing with another client's email or phone"""
+    field = CONTACT_FIELDS[e.attribute]
+    return jsonify({"error": f"A client with this {field} already exists", "field": field, "client_id": e.record_id}), 409
+
+@bp.route('/api/clients/lookup', methods=['GET'])
+def lookup_client():
     try:
-        client = get_client_by_id(client_id)
-        if client:
-            return jsonify(client)
+        email = request.args.get('email')
+        phone = request.args.get('phone')
+        if not email and not phone:
+            return jsonify({"error": "email or phone is required"}), 400
+        result = find_client(email, phone)
+        if result:
+            return jsonify(result)
         return jsonify({"error": "Client not found"}), 404
+    except Exception as e:
+        logging.error(f"Error looking up client: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/clients/<int:client_id>', methods=['GET'])
+def get_client(client_id):
+    try:
+        etag = record_etag(clients, client_id)
+        if etag is None:
+            return jsonify({"error": "Client not found"}), 404
+        return conditional(etag, lambda: json_response(get_client_json(client_id)))
     except Exception as e:
         logging.error(f"Error getting client {client_id}: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/clients', methods=['POST'])
+@bp.route('/api/clients', methods=['POST'])
 def add_client():
     try:
         data = request.json
@@ -184,11 +347,57 @@ def add_client():
             data.get('notes', '')
         )
         return jsonify(result), 201
+    except UniqueViolation as e:
+        return contact_taken(e)
     except Exception as e:
         logging.error(f"Error creating client: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/clients/<int:client_id>', methods=['PUT'])
+def read_bulk_rows():
+    """
+    Read the rows of a bulk request: a JSON array (or {"clients": [...]}),
+    or NDJSON read line by line from the request stream
+    """
+    if request.mimetype == 'application/x-ndjson':
+        rows = []
+        for number, line in enumerate(request.stream, 1):
+            if not line.strip():
+                continue
+            if len(rows) == MAX_BULK_ROWS:
+                raise OverflowError(f"At most {MAX_BULK_ROWS} rows per import")
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                raise ValueError(f"Invalid JSON on line {number}")
+        return rows
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('clients')
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array of clients or an NDJSON stream")
+    if len(data) > MAX_BULK_ROWS:
+        raise OverflowError(f"At most {MAX_BULK_ROWS} rows per import")
+    return data
+
+@bp.route('/api/clients/bulk', methods=['POST'])
+def add_clients_bulk():
+    try:
+        try:
+            rows = read_bulk_rows()
+        except OverflowError as e:
+            return jsonify({"error": str(e)}), 413
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        result = import_clients(rows)
+        return jsonify(result), 201 if result["created"] else 200
+    except UniqueViolation as e:
+        return contact_taken(e)
+    except Exception as e:
+        logging.error(f"Error importing clients: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/clients/<int:client_id>', methods=['PUT'])
 def update_client_route(client_id):
     try:
         data = request.json
@@ -203,11 +412,13 @@ def update_client_route(client_id):
         if result:
             return jsonify(result)
         return jsonify({"error": "Client not found"}), 404
+    except UniqueViolation as e:
+        return contact_taken(e)
     except Exception as e:
         logging.error(f"Error updating client {client_id}: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/clients/<int:client_id>', methods=['DELETE'])
+@bp.route('/api/clients/<int:client_id>', methods=['DELETE'])
 def delete_client_route(client_id):
     try:
         result = delete_client(client_id)
@@ -219,37 +430,39 @@ def delete_client_route(client_id):
         return jsonify({"error": str(e)}), 500
 
 # Initiative routes
-@app.route('/initiatives')
+@bp.route('/initiatives')
 def initiative_page():
     return render_template('initiatives.html')
 
-@app.route('/api/initiative-categories', methods=['GET'])
+@bp.route('/api/initiative-categories', methods=['GET'])
 def get_initiative_categories():
     return jsonify(initiative_categories)
 
-@app.route('/api/initiatives', methods=['GET'])
+@bp.route('/api/initiatives', methods=['GET'])
 def get_initiatives():
     try:
         category_filter = request.args.get('category')
         status_filter = request.args.get('status')
-        all_initiatives = get_all_initiatives(category_filter, status_filter)
-        return jsonify(all_initiatives)
+        return conditional(collection_etag(initiatives), lambda: list_response(
+            get_all_initiatives, get_initiatives_page,
+            category_filter=category_filter, status_filter=status_filter
+        ))
     except Exception as e:
         logging.error(f"Error getting initiatives: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/initiatives/<int:initiative_id>', methods=['GET'])
+@bp.route('/api/initiatives/<int:initiative_id>', methods=['GET'])
 def get_initiative(initiative_id):
     try:
-        initiative = get_initiative_by_id(initiative_id)
-        if initiative:
-            return jsonify(initiative)
-        return jsonify({"error": "Initiative not found"}), 404
+        etag = record_etag(initiatives, initiative_id)
+        if etag is None:
+            return jsonify({"error": "Initiative not found"}), 404
+        return conditional(etag, lambda: json_response(get_initiative_json(initiative_id)))
     except Exception as e:
         logging.error(f"Error getting initiative {initiative_id}: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/initiatives', methods=['POST'])
+@bp.route('/api/initiatives', methods=['POST'])
 def add_initiative():
     try:
         data = request.json
@@ -265,7 +478,7 @@ def add_initiative():
         logging.error(f"Error creating initiative: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/initiatives/<int:initiative_id>', methods=['PUT'])
+@bp.route('/api/initiatives/<int:initiative_id>', methods=['PUT'])
 def update_initiative_route(initiative_id):
     try:
         data = request.json
@@ -284,7 +497,28 @@ def update_initiative_route(initiative_id):
         logging.error(f"Error updating initiative {initiative_id}: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/initiatives/<int:initiative_id>', methods=['DELETE'])
+def batch_update_response(apply):
+    """
+    Run a batch update on the request body. Only ids and versions are sent
+    back unless ?fields= asks for more of each record.
+    """
+    try:
+        result = apply(request.get_json(silent=True), parse_fields(request.args.get('fields')))
+    except BatchError as e:
+        return jsonify({"error": str(e), "errors": e.errors}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result)
+
+@bp.route('/api/initiatives', methods=['PATCH'])
+def update_initiatives_route():
+    try:
+        return batch_update_response(update_initiatives)
+    except Exception as e:
+        logging.error(f"Error updating initiatives: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/initiatives/<int:initiative_id>', methods=['DELETE'])
 def delete_initiative_route(initiative_id):
     try:
         result = delete_initiative(initiative_id)
@@ -296,35 +530,41 @@ def delete_initiative_route(initiative_id):
         return jsonify({"error": str(e)}), 500
 
 # Mentorship routes
-@app.route('/mentorships')
+@bp.route('/mentorships')
 def mentorship_page():
     return render_template('mentorships.html')
 
-@app.route('/api/mentorships', methods=['GET'])
+@bp.route('/api/mentorships', methods=['GET'])
 def get_mentorships():
     try:
         client_id = request.args.get('client_id')
         status_filter = request.args.get('status')
         if client_id:
             client_id = int(client_id)
-        all_mentorships = get_all_mentorships(client_id, status_filter)
-        return jsonify(all_mentorships)
+        # Mentorships embed client names, so client writes change them too
+        return conditional(collection_etag(mentorships, clients), lambda: list_response(
+            get_all_mentorships, get_mentorships_page,
+            client_id=client_id, status_filter=status_filter,
+            expand=request.args.get('expand')
+        ))
     except Exception as e:
         logging.error(f"Error getting mentorships: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/mentorships/<int:mentorship_id>', methods=['GET'])
+@bp.route('/api/mentorships/<int:mentorship_id>', methods=['GET'])
 def get_mentorship(mentorship_id):
     try:
-        mentorship = get_mentorship_by_id(mentorship_id)
-        if mentorship:
-            return jsonify(mentorship)
-        return jsonify({"error": "Mentorship not found"}), 404
+        def build():
+            mentorship = get_mentorship_by_id(mentorship_id, request.args.get('expand'))
+            if mentorship:
+                return jsonify(mentorship)
+            return jsonify({"error": "Mentorship not found"}), 404
+        return conditional(collection_etag(mentorships, clients), build)
     except Exception as e:
         logging.error(f"Error getting mentorship {mentorship_id}: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/mentorships', methods=['POST'])
+@bp.route('/api/mentorships', methods=['POST'])
 def add_mentorship():
     try:
         data = request.json
@@ -339,7 +579,7 @@ def add_mentorship():
         logging.error(f"Error creating mentorship: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/mentorships/<int:mentorship_id>', methods=['PUT'])
+@bp.route('/api/mentorships/<int:mentorship_id>', methods=['PUT'])
 def update_mentorship_route(mentorship_id):
     try:
         data = request.json
@@ -359,7 +599,15 @@ def update_mentorship_route(mentorship_id):
         logging.error(f"Error updating mentorship {mentorship_id}: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/mentorships/<int:mentorship_id>', methods=['DELETE'])
+@bp.route('/api/mentorships', methods=['PATCH'])
+def update_mentorships_route():
+    try:
+        return batch_update_response(update_mentorships)
+    except Exception as e:
+        logging.error(f"Error updating mentorships: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/mentorships/<int:mentorship_id>', methods=['DELETE'])
 def delete_mentorship_route(mentorship_id):
     try:
         result = delete_mentorship(mentorship_id)
@@ -369,54 +617,3 @@ def delete_mentorship_route(mentorship_id):
     except Exception as e:
         logging.error(f"Error deleting mentorship {mentorship_id}: {str(e)}")
         return jsonify({"error": str(e)}), 500
-
-
-# Export API Routes
-@app.route('/api/export/clients', methods=['POST'])
-def export_clients_api():
-    """Export clients data in various formats"""
-    try:
-        from flask import make_response
-        import csv
-        import json
-        from datetime import datetime
-        import io
-        
-        data = request.get_json()
-        format_type = data.get('format', 'csv')
-        
-        # Get clients data
-        clients = get_all_clients()
-        
-        # Convert to exportable format
-        export_data = []
-        for client in clients:
-            export_data.append({
-                'Nome': client.name,
-                'Email': client.email,
-                'Telefone': client.phone,
-                'Status': client.status.value,
-                'Notas': client.notes,
-                'Data_Criacao': datetime.now().strftime('%d/%m/%Y')
-            })
-        
-        if format_type == 'csv':
-            output = io.StringIO()
-            writer = csv.DictWriter(output, fieldnames=export_data[0].keys())
-            writer.writeheader()
-            writer.writerows(export_data)
-            
-            response = make_response(output.getvalue())
-            response.headers['Content-Type'] = 'text/csv; charset=utf-8'
-            response.headers['Content-Disposition'] = f'attachment; filename=clientes_{datetime.now().strftime("%Y%m%d")}.csv'
-            return response
-        elif format_type == 'json':
-            response = make_response(json.dumps(export_data, ensure_ascii=False, indent=2))
-            response.headers['Content-Type'] = 'application/json; charset=utf-8'
-            response.headers['Content-Disposition'] = f'attachment; filename=clientes_{datetime.now().strftime("%Y%m%d")}.json'
-            return response
-        else:
-            return jsonify({'error': 'Formato não suportado'}), 400
-            
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
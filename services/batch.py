@@ -0,0 +1,106 @@
+from enum import Enum
+
+from services.repository import normalize_value
+
+# Updates accepted by one batch request
+MAX_BATCH_UPDATES = 500
+
+class BatchError(ValueError):
+    """
+    A batch rejected as a whole; `errors` holds one entry per bad update
+    """
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid update(s), nothing was applied")
+        self.errors = errors
+
+def text(value):
+    if not isinstance(value, str) or not value.strip():
+        return "must be a non-empty string"
+    return None
+
+def one_of(enum):
+    values = {member.value for member in enum}
+    def check(value):
+        if not isinstance(value, (str, Enum)) or normalize_value(value) not in values:
+            return f"must be one of {', '.join(sorted(values))}"
+        return None
+    return check
+
+def int_between(low, high):
+    def check(value):
+        if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high:
+            return f"must be an integer from {low} to {high}"
+        return None
+    return check
+
+def list_value(value):
+    if not isinstance(value, list):
+        return "must be a list"
+    return None
+
+def is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def validate_updates(updates, table, checks):
+    """
+    Check a batch of partial updates before any of them is applied.
+    Each update is an object with the `id` of an existing record (at most
+    once per batch) and some of the fields in `checks`, which maps each
+    field to a function returning an error message or None.
+    Returns the loaded records and their changes as (record, changes)
+    pairs in input order, or raises BatchError listing every problem.
+    """
+    if not isinstance(updates, list) or not updates:
+        raise ValueError("Expected a non-empty list of updates")
+    if len(updates) > MAX_BATCH_UPDATES:
+        raise ValueError(f"At most {MAX_BATCH_UPDATES} updates per batch")
+
+    ids = [update.get("id") if isinstance(update, dict) else None for update in updates]
+    records = table.get_many({record_id for record_id in ids if is_id(record_id)})
+
+    errors = []
+    seen = set()
+    for index, (update, record_id) in enumerate(zip(updates, ids)):
+        if not isinstance(update, dict):
+            errors.append({"index": index, "error": "Update must be an object"})
+            continue
+        if not is_id(record_id):
+            errors.append({"index": index, "error": "id must be an integer"})
+            continue
+        if record_id not in records:
+            errors.append({"index": index, "id": record_id, "error": "Record not found"})
+            continue
+        if record_id in seen:
+            errors.append({"index": index, "id": record_id, "error": "Record updated twice in one batch"})
+            continue
+        seen.add(record_id)
+        for field, value in update.items():
+            if field == "id":
+                continue
+            check = checks.get(field)
+            error = f"Unknown field {field}" if check is None else check(value)
+            if error:
+                if check is not None:
+                    error = f"{field} {error}"
+                errors.append({"index": index, "id": record_id, "error": error})
+
+    if errors:
+        raise BatchError(errors)
+    return [
+        (records[record_id], {field: value for field, value in update.items() if field != "id"})
+        for update, record_id in zip(updates, ids)
+    ]
+
+def summarize(records, fields=None):
+    """
+    The response body of a batch: each record's id and new version, plus
+    the requested `fields` of its serialized form
+    """
+    updated = []
+    for record in records:
+        item = {"id": record.id, "version": record.version}
+        if fields:
+            record_dict = record.to_dict()
+            item.update((field, record_dict[field]) for field in fields if field in record_dict)
+        updated.append(item)
+    return {"updated": updated}
@@ -1,15 +1,30 @@
-from models import Client, clients, ClientStatus
-from datetime import datetime
+from models import Client, clients, ClientStatus, normalize_email, normalize_phone
+from services.pagination import DEFAULT_PAGE_SIZE, decode_cursor, paginate, project
+from services.repository import UniqueViolation
 
-def get_all_clients(status_filter=None):
+# Contact a unique client attribute is derived from, for error messages
+CONTACT_FIELDS = {"email_key": "email", "phone_key": "phone"}
+
+def get_all_clients(status_filter=None, fields=None):
     """
     Get all clients, optionally filtered by status
     """
-    result = []
-    for client in clients.values():
-        if status_filter is None or client.status == status_filter:
-            result.append(client.to_dict())
-    return result
+    return [project(client.to_dict(), fields) for client in clients.select(status=status_filter)]
+
+def get_clients_page(status_filter=None, limit=DEFAULT_PAGE_SIZE, cursor=None, fields=None):
+    """
+    Get one page of clients, optionally filtered by status
+    """
+    selected = clients.select(after=decode_cursor(cursor, clients), status=status_filter)
+    return paginate(clients, selected, Client.to_dict, limit, fields)
+
+def iter_clients(status_filter=None, since=None):
+    """
+    Walk clients lazily, optionally filtered by status and creation date
+    """
+    for client in clients.select(status=status_filter):
+        if since is None or client.created_at >= since:
+            yield client
 
 def get_client_by_id(client_id):
     """
@@ -20,48 +35,183 @@ def get_client_by_id(client_id):
         return client.to_dict()
     return None
 
+def get_client_json(client_id):
+    """
+    Get a client by ID as encoded JSON bytes, served from the record's cache
+    """
+    client = clients.get(client_id)
+    if client:
+        return client.to_json()
+    return None
+
+def get_clients_by_ids(client_ids):
+    """
+    Get the clients with the given IDs in a single batch, keyed by ID
+    """
+    return clients.get_many(set(client_ids))
+
+def find_client(email=None, phone=None):
+    """
+    Get the client with the given email or phone (compared normalized)
+    through the unique indexes, without scanning
+    """
+    if email:
+        attribute, value = "email_key", normalize_email(email)
+    else:
+        attribute, value = "phone_key", normalize_phone(phone)
+    if not value:
+        return None
+    client_id = clients.lookup(attribute, [value]).get(value)
+    return None if client_id is None else get_client_by_id(client_id)
+
+def check_contacts_free(client_id, email=None, phone=None):
+    """
+    Raise UniqueViolation if another client already has this email or phone
+    """
+    keys = {"email_key": normalize_email(email), "phone_key": normalize_phone(phone)}
+    for attribute, value in keys.items():
+        if value:
+            holder = clients.lookup(attribute, [value]).get(value)
+            if holder is not None and holder != client_id:
+                raise UniqueViolation(attribute, value, holder)
+
 def create_client(name, email, phone, status=ClientStatus.PROSPECT, notes=""):
     """
-    Create a new client
+    Create a new client (UniqueViolation if its email or phone is taken)
     """
     if not name or not email or not phone:
         raise ValueError("Name, email, and phone are required")
     
     client = Client(name, email, phone, status, notes)
-    clients[client.id] = client
+    clients.add(client)
     return client.to_dict()
 
+# Rows accepted by one bulk import
+MAX_BULK_ROWS = 10000
+
+def _bulk_row_error(row):
+    if not isinstance(row, dict):
+        return "Row must be an object"
+    name, email = row.get("name"), row.get("email")
+    if not isinstance(name, str) or not name.strip():
+        return "Name is required"
+    if not isinstance(email, str) or "@" not in email.strip()[1:-1]:
+        return "A valid email is required"
+    status = row.get("status", ClientStatus.PROSPECT)
+    if not isinstance(status, str) or status not in {member.value for member in ClientStatus}:
+        return f"Unknown status: {status}"
+    for field in ("phone", "notes"):
+        if not isinstance(row.get(field), (str, type(None))):
+            return f"{field.capitalize()} must be a string"
+    return None
+
+def import_clients(rows):
+    """
+    Create clients in bulk. Every row is validated first, rows whose
+    normalized email repeats an earlier row or an existing client are
+    skipped, and the new clients are inserted all together in one write.
+    Phone is optional here, since imported prospects rarely have one, but
+    a phone another row or client already has makes the row invalid.
+    Returns the counts and one result per row, in input order.
+    """
+    if len(rows) > MAX_BULK_ROWS:
+        raise ValueError(f"At most {MAX_BULK_ROWS} rows per import")
+
+    # Lookups and insert as one unit, so no concurrent write slips between
+    with clients.transaction():
+        results = _import_clients(rows)
+
+    counts = {"created": 0, "exists": 0, "duplicate": 0, "invalid": 0}
+    for result in results:
+        counts[result["status"]] += 1
+    return {**counts, "results": results}
+
+def _import_clients(rows):
+    results = []
+    pending = {}  # normalized email -> index of the row creating it
+    for index, row in enumerate(rows):
+        error = _bulk_row_error(row)
+        if error:
+            results.append({"row": index, "status": "invalid", "error": error})
+            continue
+        email = normalize_email(row["email"])
+        if email in pending:
+            results.append({"row": index, "status": "duplicate", "duplicate_of": pending[email]})
+            continue
+        pending[email] = index
+        results.append({"row": index, "status": "created"})
+
+    existing = clients.lookup("email_key", list(pending))
+    for email, client_id in existing.items():
+        result = results[pending.pop(email)]
+        result["status"] = "exists"
+        result["id"] = client_id
+
+    phones = {}  # normalized phone -> index of the first row using it
+    for email, index in list(pending.items()):
+        phone = normalize_phone(rows[index].get("phone"))
+        if not phone:
+            continue
+        if phone in phones:
+            results[index].update(status="invalid", error=f"Phone repeats row {phones[phone]}")
+            del pending[email]
+            continue
+        phones[phone] = index
+    for phone, client_id in clients.lookup("phone_key", list(phones)).items():
+        index = phones[phone]
+        results[index].update(status="invalid", error=f"Phone already belongs to client {client_id}")
+        del pending[normalize_email(rows[index]["email"])]
+
+    new_clients = []
+    for email, client_id in zip(pending, clients.allocate_ids(len(pending))):
+        row = rows[pending[email]]
+        new_clients.append(Client(
+            row["name"].strip(),
+            row["email"].strip(),
+            row.get("phone") or "",
+            row.get("status", ClientStatus.PROSPECT),
+            row.get("notes") or "",
+            id=client_id
+        ))
+        results[pending[email]]["id"] = client_id
+    clients.add_many(new_clients)
+    return results
+
 def update_client(client_id, name=None, email=None, phone=None, status=None, notes=None):
     """
-    Update an existing client
+    Update an existing client (UniqueViolation if the new email or phone
+    belongs to another client)
     """
-    client = clients.get(client_id)
-    if not client:
-        return None
-    
-    if name is not None:
-        client.name = name
-    
-    if email is not None:
-        client.email = email
-    
-    if phone is not None:
-        client.phone = phone
-    
-    if status is not None:
-        client.status = status
-    
-    if notes is not None:
-        client.notes = notes
-    
-    client.updated_at = datetime.now()
+    # The check and the write are one unit: in memory the client is
+    # changed in place, so a clash must be caught before the first change
+    with clients.transaction():
+        client = clients.get(client_id)
+        if not client:
+            return None
+        
+        check_contacts_free(client_id, email, phone)
+        
+        if name is not None:
+            client.name = name
+        
+        if email is not None:
+            client.email = email
+        
+        if phone is not None:
+            client.phone = phone
+        
+        if status is not None:
+            client.status = status
+        
+        if notes is not None:
+            client.notes = notes
+        
+        client.touch()
+        clients.save(client)
     return client.to_dict()
 
 def delete_client(client_id):
     """
     Delete a client by ID
     """
-    if client_id in clients:
-        del clients[client_id]
-        return True
-    return False
+    return clients.delete(client_id)
@@ -0,0 +1,77 @@
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip is offered without it
+    brotli = None
+
+# Bodies smaller than this are sent as they are
+COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", 4))
+
+COMPRESSIBLE_TYPES = {
+    "application/json", "application/javascript", "text/html", "text/css",
+    "text/javascript", "text/plain", "text/csv", "image/svg+xml",
+}
+
+def gzip_compress(data):
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+def brotli_compress(data):
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+# Supported content codings, most preferred first
+CODINGS = [("gzip", gzip_compress)]
+if brotli is not None:
+    CODINGS.insert(0, ("br", brotli_compress))
+
+def negotiate(accept_encodings):
+    """
+    Pick the coding to use for a request's Accept-Encoding, or None
+    """
+    for coding, compress in CODINGS:
+        if accept_encodings[coding] > 0:
+            return coding, compress
+    return None
+
+def compress_response(response, accept_encodings):
+    """
+    Compress a buffered response body in place when the client accepts it
+    and it is worth it. Streamed and file responses are left alone.
+    A 304 gets the same Vary and validator as the 200 it stands for.
+    """
+    if response.direct_passthrough or response.is_streamed:
+        return response
+    if response.mimetype not in COMPRESSIBLE_TYPES or "Content-Encoding" in response.headers:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    if response.status_code not in (200, 304):
+        return response
+    chosen = negotiate(accept_encodings)
+    if chosen is None:
+        return response
+
+    # The encoded bytes differ from the identity body, so the validator
+    # becomes weak; If-None-Match is compared weakly either way. It is
+    # weakened whenever a coding is negotiated, compressed or not, so a
+    # 304 (which has no body to measure) always matches its 200.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    if response.status_code != 200 or response.content_length < COMPRESS_MIN_SIZE:
+        return response
+
+    coding, compress = chosen
+    response.set_data(compress(response.get_data()))
+    response.headers["Content-Encoding"] = coding
+    return response
+
+def init_compression(app):
+    from flask import request
+
+    @app.after_request
+    def compress(response):
+        return compress_response(response, request.accept_encodings)
@@ -0,0 +1,68 @@
+import queue
+import threading
+
+# Events buffered per subscriber before it is considered too slow and dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+
+class EventBroker:
+    """
+    In-process publish/subscribe fan-out keyed by topic.
+    Built on threading and queue primitives, so it works with threaded
+    gunicorn workers and with gevent/eventlet workers (which patch them).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # topic -> set of queues
+
+    def subscribe(self, topic):
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(topic, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, topic, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(topic)
+            if subscribers is None:
+                return
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[topic]
+
+    def publish(self, topic, event):
+        """
+        Deliver an event to every subscriber of a topic without blocking.
+        A subscriber whose queue is full is dropped; its stream ends and
+        the client reconnects, replaying what it missed.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # Drop the slow subscriber; the None sentinel ends its stream
+                self.unsubscribe(topic, subscriber)
+                self._close(subscriber)
+
+    @staticmethod
+    def _close(subscriber):
+        """
+        Replace whatever a subscriber has not read yet with the None
+        sentinel, so its stream ends right after the last event it sent
+        (and the reconnecting client replays everything after that one)
+        """
+        while True:
+            try:
+                subscriber.put_nowait(None)
+                return
+            except queue.Full:
+                pass
+            while True:
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    break
+
+# Chat messages, published per client service id
+chat_events = EventBroker()
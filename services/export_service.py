@@ -0,0 +1,289 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from models import clients, mentorships
+from services.client_service import iter_clients, get_clients_by_ids
+from services.mentorship_service import iter_mentorships
+from services.repository import normalize_value
+from services.stats_service import get_stats
+from services.jobs import jobs
+import client_portal
+
+# Rows written into each chunk of a streamed export
+EXPORT_CHUNK_ROWS = 100
+
+# Exports over this many source records are generated in the background
+EXPORT_BACKGROUND_ROWS = int(os.environ.get("EXPORT_BACKGROUND_ROWS", 5000))
+
+# Where background exports are written until they are downloaded
+EXPORT_DIR = os.environ.get("EXPORT_DIR", os.path.join(tempfile.gettempdir(), "ana-conecta-exports"))
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+def _date(value):
+    return value.strftime('%d/%m/%Y') if value else ''
+
+def _in_batches(records, size=EXPORT_CHUNK_ROWS):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _counted(rows, progress, total):
+    done = 0
+    for row in rows:
+        yield row
+        done += 1
+        if done % EXPORT_CHUNK_ROWS == 0:
+            progress(done, total)
+    progress(done, done)
+
+def _with_client_names(records):
+    """
+    Pair records with their client's name, resolving one batch of
+    clients per EXPORT_CHUNK_ROWS records
+    """
+    for batch in _in_batches(records):
+        referenced = get_clients_by_ids(record.client_id for record in batch)
+        for record in batch:
+            client = referenced.get(record.client_id)
+            yield record, client.name if client else ''
+
+def client_rows(status=None, since=None):
+    for client in iter_clients(status, since):
+        yield {
+            'ID': client.id,
+            'Nome': client.name,
+            'Email': client.email,
+            'Telefone': client.phone,
+            'Status': normalize_value(client.status),
+            'Notas': client.notes,
+            'Data_Criacao': _date(client.created_at),
+        }
+
+def mentorship_rows(status=None, client_id=None, since=None):
+    for mentorship, client_name in _with_client_names(iter_mentorships(client_id, status, since)):
+        yield {
+            'ID': mentorship.id,
+            'Cliente': client_name,
+            'Titulo': mentorship.title,
+            'Descricao': mentorship.description,
+            'Status': normalize_value(mentorship.status),
+            'Reunioes': len(mentorship.meetings),
+            'Documentos': len(mentorship.documents),
+            'Data_Criacao': _date(mentorship.created_at),
+        }
+
+def financial_rows(status=None, client_id=None, since=None):
+    services = client_portal.iter_client_services(client_id, status, since)
+    for service, client_name in _with_client_names(services):
+        yield {
+            'ID': service.id,
+            'Servico': service.title,
+            'Cliente': client_name,
+            'Status': normalize_value(service.status),
+            'Valor': service.price,
+            'Parcelas': service.installments,
+            'Atualizado_em': _date(service.updated_at),
+        }
+
+def analytics_rows():
+    stats = get_stats()
+    for section, label in (('clients', 'Clientes'), ('initiatives', 'Iniciativas'), ('mentorships', 'Mentorias')):
+        yield {'Categoria': label, 'Metrica': 'total', 'Valor': stats[section]['total']}
+        for group in ('by_status', 'by_category'):
+            for name, count in stats[section].get(group, {}).items():
+                yield {'Categoria': label, 'Metrica': name, 'Valor': count}
+
+class ExportDataset:
+    """
+    One exportable table: its file name, columns, the row generator and
+    the filters that generator accepts (pushed down to the service layer)
+    """
+    def __init__(self, filename, columns, rows, filters=(), size=None):
+        self.filename = filename
+        self.columns = columns
+        self.rows = rows
+        self.filters = filters
+        self.size = size
+
+EXPORT_DATASETS = {
+    'clients': ExportDataset(
+        'clientes',
+        ['ID', 'Nome', 'Email', 'Telefone', 'Status', 'Notas', 'Data_Criacao'],
+        client_rows, ('status', 'since'), size=lambda: len(clients)
+    ),
+    'mentorships': ExportDataset(
+        'mentorships',
+        ['ID', 'Cliente', 'Titulo', 'Descricao', 'Status', 'Reunioes', 'Documentos', 'Data_Criacao'],
+        mentorship_rows, ('status', 'client_id', 'since'), size=lambda: len(mentorships)
+    ),
+    'financial': ExportDataset(
+        'financeiro',
+        ['ID', 'Servico', 'Cliente', 'Status', 'Valor', 'Parcelas', 'Atualizado_em'],
+        financial_rows, ('status', 'client_id', 'since'), size=lambda: len(client_portal.client_services)
+    ),
+    'analytics': ExportDataset(
+        'analytics_completo',
+        ['Categoria', 'Metrica', 'Valor'],
+        analytics_rows
+    ),
+}
+
+class ExportRequest:
+    """
+    A validated export: dataset, format, selected columns and filters
+    """
+    def __init__(self, dataset, format_type, columns, filters):
+        self.dataset = dataset
+        self.format_type = format_type
+        self.columns = columns
+        self.filters = filters
+
+    @property
+    def content_type(self):
+        return EXPORT_FORMATS[self.format_type]
+
+    @property
+    def filename(self):
+        return f'{self.dataset.filename}_{datetime.now().strftime("%Y%m%d")}.{self.format_type}'
+
+    def should_run_in_background(self, requested=False):
+        if requested:
+            return True
+        return self.dataset.size is not None and self.dataset.size() > EXPORT_BACKGROUND_ROWS
+
+    def stream(self, progress=None):
+        """
+        Yield the export as bytes, pulling rows lazily from the service layer.
+        `progress(done, total)` is called once per EXPORT_CHUNK_ROWS rows.
+        """
+        rows = self.dataset.rows(**self.filters)
+        if progress:
+            rows = _counted(rows, progress, self.dataset.size() if self.dataset.size else None)
+        if self.columns != self.dataset.columns:
+            rows = ({column: row[column] for column in self.columns} for row in rows)
+        for chunk in STREAMERS[self.format_type](rows, self.columns):
+            yield chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+
+def parse_since(date_range):
+    """
+    Turn a dateRange value (a number of days, or "all") into a cutoff datetime
+    """
+    if date_range in (None, '', 'all'):
+        return None
+    try:
+        days = int(date_range)
+    except (ValueError, TypeError):
+        raise ValueError("dateRange must be a number of days or 'all'")
+    return datetime.now() - timedelta(days=days)
+
+def build_export(name, options):
+    """
+    Validate an export request body against the named dataset. Every
+    option is checked here, before any row is streamed.
+    """
+    dataset = EXPORT_DATASETS.get(name) if isinstance(name, str) else None
+    if dataset is None:
+        raise ValueError(f"Unknown export: {name}")
+
+    format_type = options.get('format', 'csv')
+    if not isinstance(format_type, str) or format_type not in EXPORT_FORMATS:
+        raise ValueError('Formato não suportado')
+
+    columns = options.get('columns') or dataset.columns
+    if not isinstance(columns, list) or not all(isinstance(column, str) for column in columns):
+        raise ValueError("columns must be a list of column names")
+    unknown = [column for column in columns if column not in dataset.columns]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+    filters = {}
+    if 'status' in dataset.filters and options.get('status'):
+        if not isinstance(options['status'], str):
+            raise ValueError("status must be a string")
+        filters['status'] = options['status']
+    if 'client_id' in dataset.filters and options.get('client_id'):
+        client_id = options['client_id']
+        if isinstance(client_id, bool) or not isinstance(client_id, int):
+            raise ValueError("client_id must be a valid integer")
+        filters['client_id'] = client_id
+    if 'since' in dataset.filters:
+        filters['since'] = parse_since(options.get('dateRange'))
+
+    return ExportRequest(dataset, format_type, list(columns), filters)
+
+def write_export(export, progress=None):
+    """
+    Write an export to a file under EXPORT_DIR and describe the result
+    """
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    handle, path = tempfile.mkstemp(prefix=export.dataset.filename + '_', suffix='.' + export.format_type, dir=EXPORT_DIR)
+    with os.fdopen(handle, 'wb') as export_file:
+        for chunk in export.stream(progress):
+            export_file.write(chunk)
+    return {'path': path, 'filename': export.filename, 'content_type': export.content_type}
+
+def submit_export(export):
+    """
+    Generate an export on the background job runner
+    """
+    return jobs.submit('export', export)
+
+jobs.register('export', write_export,
+              prepare=lambda options: (build_export(options.get('export'), options),))
+
+# Streaming writers. Each takes a row iterator and the column list and
+# yields text or bytes chunks; only one chunk is buffered at a time.
+
+def stream_csv(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending == EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+def stream_json_array(rows, columns):
+    yield '['
+    separator = ''
+    for batch in _in_batches(rows):
+        yield separator + ','.join(json.dumps(row, ensure_ascii=False) for row in batch)
+        separator = ','
+    yield ']'
+
+def stream_ndjson(rows, columns):
+    for batch in _in_batches(rows):
+        yield ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in batch)
+
+def stream_xlsx(rows, columns):
+    # The zip/XML machinery is only imported when a workbook is requested
+    from services.xlsx_writer import stream_workbook
+    return stream_workbook(_in_batches(rows), columns)
+
+STREAMERS = {
+    'csv': stream_csv,
+    'json': stream_json_array,
+    'ndjson': stream_ndjson,
+    'xlsx': stream_xlsx,
+}
@@ -1,21 +1,31 @@
 from models import Initiative, initiatives, InitiativeStatus
-from datetime import datetime
+from services.batch import int_between, one_of, summarize, text, validate_updates
+from services.pagination import DEFAULT_PAGE_SIZE, decode_cursor, paginate, project
+from services.repository import transaction
 
-def get_all_initiatives(category_filter=None, status_filter=None):
+# Fields a batch update may change, with their checks
+UPDATE_CHECKS = {
+    "title": text,
+    "description": text,
+    "category": text,
+    "status": one_of(InitiativeStatus),
+    "priority": int_between(1, 5),
+}
+
+def get_all_initiatives(category_filter=None, status_filter=None, fields=None):
     """
     Get all initiatives, optionally filtered by category and status
     """
-    result = []
-    for initiative in initiatives.values():
-        category_match = category_filter is None or initiative.category == category_filter
-        status_match = status_filter is None or initiative.status == status_filter
-        
-        if category_match and status_match:
-            result.append(initiative.to_dict())
-    
-    # Sort by priority (highest first)
-    result.sort(key=lambda x: x["priority"])
-    return result
+    # The table is kept sorted by priority (highest first)
+    selected = initiatives.select(category=category_filter, status=status_filter)
+    return [project(initiative.to_dict(), fields) for initiative in selected]
+
+def get_initiatives_page(category_filter=None, status_filter=None, limit=DEFAULT_PAGE_SIZE, cursor=None, fields=None):
+    """
+    Get one page of initiatives, optionally filtered by category and status
+    """
+    selected = initiatives.select(after=decode_cursor(cursor, initiatives), category=category_filter, status=status_filter)
+    return paginate(initiatives, selected, Initiative.to_dict, limit, fields)
 
 def get_initiative_by_id(initiative_id):
     """
@@ -26,6 +36,15 @@ def get_initiative_by_id(initiative_id):
         return initiative.to_dict()
     return None
 
+def get_initiative_json(initiative_id):
+    """
+    Get an initiative by ID as encoded JSON bytes, served from the record's cache
+    """
+    initiative = initiatives.get(initiative_id)
+    if initiative:
+        return initiative.to_json()
+    return None
+
 def create_initiative(title, description, category, status=InitiativeStatus.PENDING, priority=3):
     """
     Create a new initiative
@@ -41,7 +60,7 @@ def create_initiative(title, description, category, status=InitiativeStatus.PEND
         priority = 3
     
     initiative = Initiative(title, description, category, status, priority)
-    initiatives[initiative.id] = initiative
+    initiatives.add(initiative)
     return initiative.to_dict()
 
 def update_initiative(initiative_id, title=None, description=None, category=None, status=None, priority=None):
@@ -52,6 +71,13 @@ def update_initiative(initiative_id, title=None, description=None, category=None
     if not initiative:
         return None
     
+    apply_initiative_update(initiative, title, description, category, status, priority)
+    return initiative.to_dict()
+
+def apply_initiative_update(initiative, title=None, description=None, category=None, status=None, priority=None):
+    """
+    Change the given fields of a loaded initiative and save it
+    """
     if title is not None:
         initiative.title = title
     
@@ -72,14 +98,23 @@ def update_initiative(initiative_id, title=None, description=None, category=None
         except (ValueError, TypeError):
             pass
     
-    initiative.updated_at = datetime.now()
-    return initiative.to_dict()
+    initiative.touch()
+    initiatives.save(initiative)
+    return initiative
+
+def update_initiatives(updates, fields=None):
+    """
+    Apply a batch of partial updates ({"id": ..., "priority": ...}) as one
+    unit: all are validated first and none is applied if any is invalid.
+    Returns the ids and new versions, plus the requested `fields`.
+    """
+    with transaction(initiatives):
+        changes = validate_updates(updates, initiatives, UPDATE_CHECKS)
+        updated = [apply_initiative_update(initiative, **fields_changed) for initiative, fields_changed in changes]
+    return summarize(updated, fields)
 
 def delete_initiative(initiative_id):
     """
     Delete an initiative by ID
     """
-    if initiative_id in initiatives:
-        del initiatives[initiative_id]
-        return True
-    return False
+    return initiatives.delete(initiative_id)
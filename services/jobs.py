@@ -0,0 +1,246 @@
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Worker threads shared by every background job
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+
+# Job state lives in a local SQLite file so that every gunicorn worker on
+# the host can answer a status poll, whichever worker runs the job
+JOBS_DATABASE = os.environ.get("JOBS_DATABASE", os.path.join(tempfile.gettempdir(), "ana-conecta-jobs.sqlite3"))
+
+# Finished jobs (and their result files) are pruned after this long
+JOB_RETENTION = timedelta(hours=int(os.environ.get("JOB_RETENTION_HOURS", 24)))
+
+# Minimum seconds between two progress writes for the same job
+PROGRESS_INTERVAL = 0.5
+
+# Error of jobs whose process died before they finished
+ORPHANED_ERROR = "The worker running this job stopped before it finished"
+
+def process_alive(pid):
+    """Whether a process with this id runs on this host"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # alive, owned by another user
+    return True
+
+class Job:
+    """
+    A unit of background work, its progress and its outcome
+    """
+    def __init__(self, kind, id=None, status="queued", progress=0, total=None,
+                 result=None, error=None, created_at=None, finished_at=None, owner=None):
+        self.id = id or uuid.uuid4().hex
+        self.kind = kind
+        self.status = status
+        self.progress = progress
+        self.total = total
+        self.result = result
+        self.error = error
+        self.created_at = created_at or datetime.now()
+        self.finished_at = finished_at
+        self.owner = owner  # id of the process whose thread pool runs the job
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            row["kind"], id=row["id"], status=row["status"],
+            progress=row["progress"], total=row["total"],
+            result=json.loads(row["result"]) if row["result"] else None,
+            error=row["error"],
+            created_at=datetime.fromisoformat(row["created_at"]),
+            finished_at=datetime.fromisoformat(row["finished_at"]) if row["finished_at"] else None,
+            owner=row["owner"]
+        )
+
+    @property
+    def orphaned(self):
+        """Still queued or running, but in a process that is gone"""
+        unfinished = self.status in ("queued", "running")
+        return unfinished and (self.owner is None or not process_alive(self.owner))
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "total": self.total,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class JobStore:
+    """
+    SQLite table holding one row per job
+    """
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL,"
+                " progress INTEGER NOT NULL, total INTEGER, result TEXT, error TEXT,"
+                " created_at TEXT NOT NULL, finished_at TEXT, owner INTEGER)"
+            )
+            columns = {row["name"] for row in connection.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                try:
+                    connection.execute("ALTER TABLE jobs ADD COLUMN owner INTEGER")
+                except sqlite3.OperationalError:
+                    pass  # another worker added it first
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def save(self, job):
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO jobs"
+                " (id, kind, status, progress, total, result, error, created_at, finished_at, owner)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job.id, job.kind, job.status, job.progress, job.total,
+                 json.dumps(job.result) if job.result is not None else None, job.error,
+                 job.created_at.isoformat(), job.finished_at.isoformat() if job.finished_at else None,
+                 job.owner)
+            )
+
+    def save_progress(self, job):
+        with self._connect() as connection:
+            connection.execute("UPDATE jobs SET progress = ?, total = ? WHERE id = ?",
+                               (job.progress, job.total, job.id))
+
+    def get(self, job_id):
+        with self._connect() as connection:
+            row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row else None
+
+    def fail_orphans(self):
+        """
+        Mark failed the queued or running jobs of processes that are gone
+        (the thread pool holding them died with its worker)
+        """
+        with self._connect() as connection:
+            owners = [row["owner"] for row in connection.execute(
+                "SELECT DISTINCT owner FROM jobs WHERE status IN ('queued', 'running')"
+            )]
+            dead = [owner for owner in owners if owner is None or not process_alive(owner)]
+            for owner in dead:
+                connection.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?"
+                    " WHERE status IN ('queued', 'running') AND owner IS ?",
+                    (ORPHANED_ERROR, datetime.now().isoformat(), owner)
+                )
+        return len(dead)
+
+    def prune(self, before):
+        """Delete jobs finished before a cutoff, returning their results"""
+        with self._connect() as connection:
+            cutoff = before.isoformat()
+            rows = connection.execute(
+                "SELECT result FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,)
+            ).fetchall()
+            connection.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,))
+        return [json.loads(row["result"]) for row in rows if row["result"]]
+
+class JobRunner:
+    """
+    Run registered tasks on a small thread pool, off the request path.
+    Threads (not processes) are used because tasks read the in-memory
+    stores of this process.
+
+    A task is a function taking its arguments plus a `progress(done, total)`
+    callback, and returning a JSON-serializable result. A result holding a
+    `path` is a file, removed when the job is pruned.
+    """
+    def __init__(self, database=JOBS_DATABASE, max_workers=JOB_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._store = None
+        self._database = database
+        self._lock = threading.Lock()
+        self._tasks = {}
+
+    @property
+    def store(self):
+        # Opened on first use so importing the module never touches disk
+        with self._lock:
+            if self._store is None:
+                self._store = JobStore(self._database)
+                self._store.fail_orphans()
+            return self._store
+
+    def register(self, kind, function, prepare=None):
+        """
+        Register a task. `prepare(options)` turns a request body into the
+        task's arguments and raises ValueError for invalid options.
+        """
+        self._tasks[kind] = (function, prepare)
+
+    def submit_request(self, kind, options):
+        """Validate request options for a task kind and submit it"""
+        if not isinstance(kind, str) or kind not in self._tasks:
+            raise ValueError(f"Unknown job kind: {kind}")
+        prepare = self._tasks[kind][1]
+        args = prepare(options) if prepare else ()
+        return self.submit(kind, *args)
+
+    def submit(self, kind, *args):
+        self._prune()
+        job = Job(kind, owner=os.getpid())
+        self.store.save(job)
+        self._executor.submit(self._run, job, self._tasks[kind][0], args)
+        return job
+
+    def get(self, job_id):
+        job = self.store.get(job_id)
+        if job is not None and job.orphaned:
+            # Its worker died (and may not have been replaced yet)
+            self.store.fail_orphans()
+            job = self.store.get(job_id)
+        return job
+
+    def _run(self, job, function, args):
+        job.status = "running"
+        self.store.save(job)
+        last_write = 0
+
+        def progress(done, total=None):
+            nonlocal last_write
+            job.progress = done
+            job.total = total
+            now = time.monotonic()
+            if now - last_write >= PROGRESS_INTERVAL:
+                last_write = now
+                self.store.save_progress(job)
+
+        try:
+            job.result = function(*args, progress=progress)
+            job.status = "done"
+        except Exception as e:
+            logging.error(f"Job {job.id} ({job.kind}) failed: {str(e)}")
+            job.error = str(e)
+            job.status = "failed"
+        job.finished_at = datetime.now()
+        self.store.save(job)
+
+    def _prune(self):
+        for result in self.store.prune(datetime.now() - JOB_RETENTION):
+            path = result.get("path") if isinstance(result, dict) else None
+            if path and os.path.exists(path):
+                os.remove(path)
+
+jobs = JobRunner()
@@ -0,0 +1,42 @@
+import json
+import os
+from datetime import date, datetime
+from enum import Enum
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used instead
+    orjson = None
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps_json(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+def dumps_orjson(obj):
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+# Serializers by name: each turns a value into compact UTF-8 JSON bytes and
+# writes datetimes/dates as ISO 8601 and Enums as their value
+ENCODERS = {"json": dumps_json}
+if orjson is not None:
+    ENCODERS["orjson"] = dumps_orjson
+
+_encoder = ENCODERS[os.environ.get("JSON_ENCODER", "orjson" if orjson else "json")]
+
+def register_encoder(name, dumps):
+    ENCODERS[name] = dumps
+
+def set_encoder(name):
+    """Select the serializer used by dumps()"""
+    global _encoder
+    _encoder = ENCODERS[name]
+
+def dumps(obj):
+    """Encode a value as UTF-8 JSON bytes with the selected serializer"""
+    return _encoder(obj)
@@ -1,47 +1,75 @@
 from models import Mentorship, mentorships, MentorshipStatus, clients
-from datetime import datetime
+from services.batch import list_value, one_of, summarize, text, validate_updates
+from services.client_service import get_clients_by_ids
+from services.pagination import DEFAULT_PAGE_SIZE, decode_cursor, paginate, project
+from services.repository import transaction
 
-def get_all_mentorships(client_id=None, status_filter=None):
+def existing_client(client_id):
+    if isinstance(client_id, bool) or not isinstance(client_id, int) or client_id not in clients:
+        return "must be the id of an existing client"
+    return None
+
+# Fields a batch update may change, with their checks
+UPDATE_CHECKS = {
+    "client_id": existing_client,
+    "title": text,
+    "description": text,
+    "status": one_of(MentorshipStatus),
+    "meetings": list_value,
+    "documents": list_value,
+}
+
+def join_clients(mentorship_dicts, expand=None):
     """
-    Get all mentorships, optionally filtered by client and status
+    Add client_name to serialized mentorships, resolving every referenced
+    client in a single batch. With expand="client" the full client is
+    embedded as well.
     """
-    result = []
-    for mentorship in mentorships.values():
-        client_match = client_id is None or mentorship.client_id == client_id
-        status_match = status_filter is None or mentorship.status == status_filter
-        
-        if client_match and status_match:
-            mentorship_dict = mentorship.to_dict()
-            
-            # Add client name to mentorship for display purposes
-            client = clients.get(mentorship.client_id)
-            if client:
-                mentorship_dict["client_name"] = client.name
-            else:
-                mentorship_dict["client_name"] = "Unknown Client"
-                
-            result.append(mentorship_dict)
+    referenced = get_clients_by_ids(m["client_id"] for m in mentorship_dicts)
     
-    # Sort by created date (newest first)
-    result.sort(key=lambda x: x["created_at"], reverse=True)
-    return result
+    for mentorship_dict in mentorship_dicts:
+        client = referenced.get(mentorship_dict["client_id"])
+        mentorship_dict["client_name"] = client.name if client else "Unknown Client"
+        if expand == "client":
+            mentorship_dict["client"] = client.to_dict() if client else None
+    
+    return mentorship_dicts
+
+def get_all_mentorships(client_id=None, status_filter=None, fields=None, expand=None):
+    """
+    Get all mentorships, optionally filtered by client and status
+    """
+    # The table is kept sorted by created date (newest first)
+    selected = mentorships.select(client_id=client_id, status=status_filter)
+    result = join_clients([mentorship.to_dict() for mentorship in selected], expand)
+    return [project(mentorship_dict, fields) for mentorship_dict in result]
+
+def get_mentorships_page(client_id=None, status_filter=None, limit=DEFAULT_PAGE_SIZE, cursor=None, fields=None, expand=None):
+    """
+    Get one page of mentorships, optionally filtered by client and status
+    """
+    selected = mentorships.select(after=decode_cursor(cursor, mentorships), client_id=client_id, status=status_filter)
+    return paginate(mentorships, selected, Mentorship.to_dict, limit, fields,
+                    join=lambda page: join_clients(page, expand))
+
+def iter_mentorships(client_id=None, status_filter=None, since=None):
+    """
+    Walk mentorships lazily, optionally filtered by client, status and
+    creation date. The table is newest first, so the walk stops at the
+    first mentorship older than `since`.
+    """
+    for mentorship in mentorships.select(client_id=client_id, status=status_filter):
+        if since is not None and mentorship.created_at < since:
+            return
+        yield mentorship
 
-def get_mentorship_by_id(mentorship_id):
+def get_mentorship_by_id(mentorship_id, expand=None):
     """
     Get a mentorship by ID
     """
     mentorship = mentorships.get(mentorship_id)
     if mentorship:
-        mentorship_dict = mentorship.to_dict()
-        
-        # Add client name to mentorship for display purposes
-        client = clients.get(mentorship.client_id)
-        if client:
-            mentorship_dict["client_name"] = client.name
-        else:
-            mentorship_dict["client_name"] = "Unknown Client"
-            
-        return mentorship_dict
+        return join_clients([mentorship.to_dict()], expand)[0]
     return None
 
 def create_mentorship(client_id, title, description, status=MentorshipStatus.INITIAL_CONTACT):
@@ -61,13 +89,14 @@ def create_mentorship(client_id, title, description, status=MentorshipStatus.INI
         raise ValueError("Client does not exist")
     
     mentorship = Mentorship(client_id, title, description, status)
-    mentorships[mentorship.id] = mentorship
+    mentorships.add(mentorship)
     
     # Update client status to active if they were a prospect
     client = clients.get(client_id)
     if client and client.status == "prospect":
         client.status = "active"
-        client.updated_at = datetime.now()
+        client.touch()
+        clients.save(client)
     
     return mentorship.to_dict()
 
@@ -79,6 +108,14 @@ def update_mentorship(mentorship_id, client_id=None, title=None, description=Non
     if not mentorship:
         return None
     
+    apply_mentorship_update(mentorship, client_id, title, description, status, meetings, documents)
+    return join_clients([mentorship.to_dict()])[0]
+
+def apply_mentorship_update(mentorship, client_id=None, title=None, description=None, status=None, meetings=None, documents=None):
+    """
+    Change the given fields of a loaded mentorship and save it, marking
+    its client completed when the mentorship is
+    """
     if client_id is not None:
         try:
             client_id = int(client_id)
@@ -102,7 +139,8 @@ def update_mentorship(mentorship_id, client_id=None, title=None, description=Non
             client = clients.get(mentorship.client_id)
             if client:
                 client.status = "completed" 
-                client.updated_at = datetime.now()
+                client.touch()
+                clients.save(client)
     
     if meetings is not None:
         mentorship.meetings = meetings
@@ -110,24 +148,24 @@ def update_mentorship(mentorship_id, client_id=None, title=None, description=Non
     if documents is not None:
         mentorship.documents = documents
     
-    mentorship.updated_at = datetime.now()
-    
-    mentorship_dict = mentorship.to_dict()
-    
-    # Add client name to mentorship for display purposes
-    client = clients.get(mentorship.client_id)
-    if client:
-        mentorship_dict["client_name"] = client.name
-    else:
-        mentorship_dict["client_name"] = "Unknown Client"
-        
-    return mentorship_dict
+    mentorship.touch()
+    mentorships.save(mentorship)
+    return mentorship
+
+def update_mentorships(updates, fields=None):
+    """
+    Apply a batch of partial updates ({"id": ..., "status": ...}) as one
+    unit, client status changes included: all are validated first and
+    none is applied if any is invalid.
+    Returns the ids and new versions, plus the requested `fields`.
+    """
+    with transaction(mentorships, clients):
+        changes = validate_updates(updates, mentorships, UPDATE_CHECKS)
+        updated = [apply_mentorship_update(mentorship, **fields_changed) for mentorship, fields_changed in changes]
+    return summarize(updated, fields)
 
 def delete_mentorship(mentorship_id):
     """
     Delete a mentorship by ID
     """
-    if mentorship_id in mentorships:
-        del mentorships[mentorship_id]
-        return True
-    return False
+    return mentorships.delete(mentorship_id)
@@ -0,0 +1,70 @@
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(position):
+    """
+    Encode a table position entry as an opaque, URL-safe cursor
+    """
+    raw = json.dumps(list(position), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor, table):
+    """
+    Decode a cursor produced by encode_cursor back into a position entry
+    of `table`: its sort key (of the table's order type) and the id tiebreak
+    """
+    if not cursor:
+        return None
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(position, list) or len(position) != 2:
+        raise ValueError("Invalid cursor")
+    # A key of another type would fail comparing against the table's entries
+    if not all(isinstance(value, kind) and not isinstance(value, bool)
+               for value, kind in zip(position, (table.order_type, int))):
+        raise ValueError("Invalid cursor")
+    return tuple(position)
+
+def parse_fields(fields):
+    """
+    Parse a comma-separated fields parameter into a list of field names
+    """
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+def project(record_dict, fields):
+    """
+    Keep only the requested fields of a serialized record (the id is always kept)
+    """
+    if not fields:
+        return record_dict
+    return {key: record_dict[key] for key in ["id", *fields] if key in record_dict}
+
+def paginate(table, records, serialize, limit=DEFAULT_PAGE_SIZE, fields=None, join=None):
+    """
+    Serialize at most `limit` records from a lazy select() walk.
+    Only the records on the page are serialized; one extra record is
+    peeked to know whether a next cursor is needed. `join` receives the
+    whole page of dicts before projection, so it can batch its lookups.
+    """
+    limit = min(max(int(limit), 1), MAX_PAGE_SIZE)
+    items = []
+    next_cursor = None
+    last_position = None
+    for record in records:
+        if len(items) == limit:
+            next_cursor = encode_cursor(last_position)
+            break
+        items.append(serialize(record))
+        # Taken while walking: the record may be gone by the time the page ends
+        last_position = table.position_of(record)
+    
+    if join:
+        join(items)
+    return {"items": [project(item, fields) for item in items], "next_cursor": next_cursor}
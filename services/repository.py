@@ -0,0 +1,617 @@
+from bisect import bisect_left, bisect_right, insort
+from contextlib import ExitStack, contextmanager, nullcontext
+from enum import Enum
+import itertools
+import os
+import threading
+import uuid
+
+# Entries copied out of an ordered view per lock acquisition while walking
+WALK_BATCH_SIZE = 64
+
+# Identifies this process in in-memory version stamps
+PROCESS_TOKEN = uuid.uuid4().hex[:8]
+
+def record_id(record):
+    return record.id
+
+def normalize_value(value):
+    # str Enums hash by member name, so index and store them by their plain value
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+class UniqueViolation(ValueError):
+    """
+    A write would give a record a unique attribute value another record holds
+    """
+    def __init__(self, attribute, value, record_id):
+        super().__init__(f"{attribute} {value!r} already belongs to record {record_id}")
+        self.attribute = attribute
+        self.value = value
+        self.record_id = record_id
+
+class OrderedView:
+    """
+    Record ids kept sorted by a key function, so listings are a walk
+    instead of a sort. Entries are repositioned with bisect on change.
+    """
+    def __init__(self, key=record_id, reverse=False, lock=None):
+        self.key = key
+        self.reverse = reverse
+        self.lock = lock or threading.RLock()  # shared with the owning store
+        self.entries = []  # sorted (key, tiebreak) pairs
+        self.positions = {}  # record id -> entry currently stored
+
+    def entry(self, record):
+        # Ties keep insertion (id) order in both directions, like a stable sort
+        return (self.key(record), -record.id if self.reverse else record.id)
+
+    def add(self, record):
+        entry = self.entry(record)
+        insort(self.entries, entry)
+        self.positions[record.id] = entry
+
+    def remove(self, record_id):
+        entry = self.positions.pop(record_id, None)
+        if entry is None:
+            return
+        del self.entries[bisect_left(self.entries, entry)]
+
+    def update(self, record):
+        if self.positions.get(record.id) != self.entry(record):
+            self.remove(record.id)
+            self.add(record)
+
+    def __contains__(self, record_id):
+        return record_id in self.positions
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return self.walk()
+
+    def snapshot(self, after=None, size=WALK_BATCH_SIZE):
+        """Copy the next `size` entries (in view order) following `after`"""
+        entries = self.entries
+        with self.lock:
+            if self.reverse:
+                stop = len(entries) if after is None else bisect_left(entries, after)
+                return entries[max(0, stop - size):stop][::-1]
+            start = 0 if after is None else bisect_right(entries, after)
+            return entries[start:start + size]
+
+    def walk(self, after=None):
+        """
+        Yield ids in view order, starting right after the given entry.
+        Entries are copied out in small batches under the store lock and
+        each batch resumes by bisecting from the last entry seen, so a
+        page never touches the entries before it and concurrent writers
+        can't shift the walk.
+        """
+        while True:
+            batch = self.snapshot(after)
+            for _, tiebreak in batch:
+                yield abs(tiebreak)
+            if len(batch) < WALK_BATCH_SIZE:
+                return
+            after = batch[-1]
+
+class SecondaryIndex:
+    """
+    Maps an attribute value to the ordered view of record ids holding that value
+    """
+    def __init__(self, attribute, key=record_id, reverse=False, lock=None):
+        self.attribute = attribute
+        self.key = key
+        self.reverse = reverse
+        self.lock = lock
+        self.buckets = {}
+        self.values = {}  # record id -> value currently indexed
+
+    def add(self, record):
+        value = normalize_value(getattr(record, self.attribute))
+        if value not in self.buckets:
+            self.buckets[value] = OrderedView(self.key, self.reverse, self.lock)
+        self.buckets[value].add(record)
+        self.values[record.id] = value
+
+    def remove(self, record_id):
+        if record_id not in self.values:
+            return
+        value = self.values.pop(record_id)
+        bucket = self.buckets[value]
+        bucket.remove(record_id)
+        if not bucket:
+            del self.buckets[value]
+
+    def update(self, record):
+        value = normalize_value(getattr(record, self.attribute))
+        if record.id in self.values and self.values[record.id] == value:
+            self.buckets[value].update(record)
+        else:
+            self.remove(record.id)
+            self.add(record)
+
+    def get(self, value):
+        return self.buckets.get(normalize_value(value), ())
+
+class UniqueIndex:
+    """
+    Hash index of an attribute whose values identify at most one record.
+    None values (e.g. a missing phone) are not indexed.
+    """
+    def __init__(self, attribute):
+        self.attribute = attribute
+        self.ids = {}  # value -> record id
+        self.values = {}  # record id -> value currently indexed
+
+    def value(self, record):
+        return normalize_value(getattr(record, self.attribute))
+
+    def check(self, records):
+        """Raise UniqueViolation if the records clash with each other or the index"""
+        claimed = {}
+        for record in records:
+            value = self.value(record)
+            if value is None:
+                continue
+            holder = claimed.get(value, self.ids.get(value))
+            if holder is not None and holder != record.id:
+                raise UniqueViolation(self.attribute, value, holder)
+            claimed[value] = record.id
+
+    def add(self, record):
+        value = self.value(record)
+        if value is not None:
+            self.ids[value] = record.id
+            self.values[record.id] = value
+
+    def remove(self, record_id):
+        value = self.values.pop(record_id, None)
+        if value is not None:
+            del self.ids[value]
+
+    def update(self, record):
+        self.remove(record.id)
+        self.add(record)
+
+    def get(self, value):
+        return self.ids.get(normalize_value(value))
+
+class Repository:
+    """
+    Storage interface shared by the backends. Records are model instances
+    with an integer `id`; every store is kept in a fixed order (a key
+    function returning `order_type` values, plus direction) and indexed
+    on a few attributes. Unique
+    attributes are hash indexed: a write giving a record a value another
+    record holds raises UniqueViolation and changes nothing.
+    
+    Reads: get, in, len, values, get_many, select, position, counts, lookup.
+    Writes: allocate_id, add, save (after mutating a record in place), delete,
+    plus allocate_ids/add_many for batches written all at once, and
+    append(record, field, item) to grow one of the record's collections
+    (a list or ChatLog) after touching it, writing only the new item;
+    items with an `id` attribute are numbered by their position.
+    Versions: `version` changes with every write to the store and
+    version_of() gives a record's version; prefixed with `etag_prefix`
+    they make cache validators that are cheap to compute.
+    Listeners: subscribe(listener) calls listener(event, record_id, record)
+    after each add/save/delete ("add", "save" or "delete"; record is None
+    for deletes), outside the store's lock.
+    Transactions: writes made inside `with store.transaction():` (or the
+    module's transaction(*stores)) are applied as one unit, and listeners
+    hear about them only once it ends without an error. Inside one,
+    lock_writes() makes other writers of the store (in any worker) wait
+    for it to end, so a read-then-write such as "seed if empty" can't race.
+    """
+    etag_prefix = ""
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def notify(self, event, record_id, record=None):
+        pending = getattr(self.pending, "events", None)
+        if pending is not None:
+            pending.append((event, record_id, record))
+            return
+        for listener in self.listeners:
+            listener(event, record_id, record)
+
+    @contextmanager
+    def deferred_notifications(self):
+        """Queue this thread's notifications until the outermost block exits"""
+        if getattr(self.pending, "events", None) is not None:
+            yield
+            return
+        self.pending.events = []
+        try:
+            yield
+        finally:
+            events, self.pending.events = self.pending.events, None
+        for event in events:
+            self.notify(*event)
+
+    def transaction(self):
+        raise NotImplementedError
+
+    def lock_writes(self):
+        raise NotImplementedError
+
+    @property
+    def version(self):
+        raise NotImplementedError
+
+    def version_of(self, record_id):
+        raise NotImplementedError
+
+    def allocate_id(self):
+        raise NotImplementedError
+
+    def allocate_ids(self, count):
+        raise NotImplementedError
+
+    def add(self, record):
+        raise NotImplementedError
+
+    def add_many(self, records):
+        raise NotImplementedError
+
+    def save(self, record):
+        raise NotImplementedError
+
+    def append(self, record, field, item):
+        raise NotImplementedError
+
+    def delete(self, record_id):
+        raise NotImplementedError
+
+    def get_many(self, record_ids):
+        raise NotImplementedError
+
+    def counts(self, name):
+        raise NotImplementedError
+
+    def lookup(self, name, values):
+        raise NotImplementedError
+
+    def position(self, record_id):
+        raise NotImplementedError
+
+    def position_of(self, record):
+        raise NotImplementedError
+
+    def select(self, after=None, **filters):
+        raise NotImplementedError
+
+class MemoryRepository(dict, Repository):
+    """
+    In-memory backend: a dict keyed by record id, keeping its ordered view
+    and secondary indexes in sync. Reads use the plain dict interface or
+    select(); writes must go through add/save/delete.
+    
+    Safe under threaded workers: ids come from an itertools.count (atomic
+    under the GIL) and every write, plus each batch copied out by a walk,
+    holds the store's own lock, so stores never contend with each other.
+    
+    Durable when given a journal (services.wal): each write is logged
+    under the lock and returns once the log is fsynced. Records with
+    `collections` log them only on add: saves log the other fields and
+    appends just the new item.
+    """
+    def __init__(self, name, order=record_id, reverse=False, unique=(), journal=None, collections=(), order_type=int,
+                 **indexes):
+        super().__init__()
+        self.name = name
+        self.order_type = order_type
+        self.collections = set(collections)
+        self.lock = threading.RLock()
+        self.ids = itertools.count(1)
+        self.last_id = 0  # highest id written to the journal, deletes included
+        self.view = OrderedView(order, reverse, self.lock)
+        self._version = 0
+        self.listeners = []
+        self.pending = threading.local()
+        self.indexes = {}
+        for attribute in indexes:
+            self.indexes[attribute] = SecondaryIndex(attribute, order, reverse, self.lock)
+        self.unique = {attribute: UniqueIndex(attribute) for attribute in unique}
+        self.journal = journal
+        if journal is not None:
+            journal.register(self)
+
+    def log(self, op, records):
+        # Called under the lock, so the log keeps each record's write order
+        if self.journal is None:
+            return None
+        self.last_id = max(self.last_id, *(record.id for record in records))
+        if op == "save" and self.collections:
+            return self.journal.log([(self.name, "fields", record.id, self.fields(record)) for record in records])
+        return self.journal.log([
+            (self.name, op, record.id, None if op == "delete" else record) for record in records
+        ])
+
+    def fields(self, record):
+        """The record's state without its collections"""
+        return {name: value for name, value in record.__getstate__().items() if name not in self.collections}
+
+    def wait_durable(self, position):
+        if position is not None:
+            self.journal.wait(position)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Hold the store's lock across several writes, so other writers and
+        walks see all of them or none. Nothing is rolled back in memory:
+        callers validate the whole batch before the first write.
+        """
+        with self.deferred_notifications():
+            with self.journal.transaction() if self.journal else nullcontext():
+                with self.lock:
+                    yield
+
+    def lock_writes(self):
+        # transaction() already holds the store's lock
+        pass
+
+    def allocate_id(self):
+        return next(self.ids)
+
+    def allocate_ids(self, count):
+        return [next(self.ids) for _ in range(count)]
+
+    def add(self, record):
+        with self.lock:
+            if record.id in self:
+                raise KeyError(f"Duplicate id {record.id} in {self.name}")
+            for index in self.unique.values():
+                index.check([record])
+            self[record.id] = record
+            self._version += 1
+            self.view.add(record)
+            for index in [*self.indexes.values(), *self.unique.values()]:
+                index.add(record)
+            position = self.log("add", [record])
+        self.wait_durable(position)
+        self.notify("add", record.id, record)
+        return record
+
+    def add_many(self, records):
+        """Add a batch of records under one lock hold: all of them or none"""
+        with self.lock:
+            for record in records:
+                if record.id in self:
+                    raise KeyError(f"Duplicate id {record.id} in {self.name}")
+            for index in self.unique.values():
+                index.check(records)
+            for record in records:
+                self[record.id] = record
+                self.view.add(record)
+                for index in [*self.indexes.values(), *self.unique.values()]:
+                    index.add(record)
+            self._version += 1
+            position = self.log("add", records) if records else None
+        self.wait_durable(position)
+        for record in records:
+            self.notify("add", record.id, record)
+        return records
+
+    def save(self, record):
+        """
+        Re-index and reposition a record after its attributes were changed
+        in place. A unique clash is only detected here, after the change:
+        callers check unique values first (inside transaction()).
+        """
+        with self.lock:
+            if record.id not in self:
+                return record
+            for index in self.unique.values():
+                index.check([record])
+            self._version += 1
+            self.view.update(record)
+            for index in [*self.indexes.values(), *self.unique.values()]:
+                index.update(record)
+            position = self.log("save", [record])
+        self.wait_durable(position)
+        self.notify("save", record.id, record)
+        return record
+
+    def append(self, record, field, item):
+        """
+        Append `item` to the record's collection `field` and reposition
+        the record; only the item and the other fields are logged
+        """
+        with self.lock:
+            collection = getattr(record, field)
+            collection.append(item)
+            if record.id not in self:
+                return item
+            self._version += 1
+            self.view.update(record)
+            for index in [*self.indexes.values(), *self.unique.values()]:
+                index.update(record)
+            position = None
+            if self.journal is not None:
+                entry = (field, len(collection) - 1, item, self.fields(record))
+                position = self.journal.log([(self.name, "append", record.id, entry)])
+        self.wait_durable(position)
+        self.notify("save", record.id, record)
+        return item
+
+    def delete(self, record_id):
+        with self.lock:
+            record = self.pop(record_id, None)
+            if record is None:
+                return False
+            self._version += 1
+            self.view.remove(record_id)
+            for index in [*self.indexes.values(), *self.unique.values()]:
+                index.remove(record_id)
+            position = self.log("delete", [record])
+        self.wait_durable(position)
+        self.notify("delete", record_id)
+        return True
+
+    # Recovery from the journal: its snapshots read the records through
+    # batches(), and recovery puts them back with load(), unlogged
+
+    def batches(self, size):
+        """Yield the records in lists of `size`, each copied under the lock"""
+        records = self.view.walk()
+        while True:
+            with self.lock:
+                batch = [self[record_id] for record_id in itertools.islice(records, size) if record_id in self]
+            if not batch:
+                return
+            yield batch
+
+    def load(self, records):
+        """Replace the contents with the given records, sorting each view once"""
+        with self.lock:
+            self.clear()
+            self.update((record.id, record) for record in records)
+            for index in self.indexes.values():
+                index.buckets.clear()
+                index.values.clear()
+            for index in self.unique.values():
+                index.ids.clear()
+                index.values.clear()
+            self.view.entries = []
+            self.view.positions = {}
+            for record in records:
+                entry = self.view.entry(record)
+                self.view.entries.append(entry)
+                self.view.positions[record.id] = entry
+                for index in self.indexes.values():
+                    value = normalize_value(getattr(record, index.attribute))
+                    if value not in index.buckets:
+                        index.buckets[value] = OrderedView(index.key, index.reverse, index.lock)
+                    index.buckets[value].entries.append(entry)
+                    index.buckets[value].positions[record.id] = entry
+                    index.values[record.id] = value
+                for index in self.unique.values():
+                    index.add(record)
+            self.view.entries.sort()
+            for index in self.indexes.values():
+                for bucket in index.buckets.values():
+                    bucket.entries.sort()
+
+    def recovered(self, last_id=0):
+        """
+        Continue ids after the highest one the journal ever logged (a
+        deleted record's id is not handed out again) and mark the store
+        changed
+        """
+        with self.lock:
+            self.last_id = max(last_id, max(self, default=0))
+            self.ids = itertools.count(self.last_id + 1)
+            self._version += 1
+
+    @property
+    def etag_prefix(self):
+        # Counters restart with the process, so validators carry its token
+        return PROCESS_TOKEN
+
+    @property
+    def version(self):
+        return self._version
+
+    def version_of(self, record_id):
+        record = self.get(record_id)
+        return None if record is None else record.version
+
+    def get_many(self, record_ids):
+        """Return the records with the given ids, keyed by id, in one batch"""
+        found = {record_id: self.get(record_id) for record_id in record_ids}
+        return {record_id: record for record_id, record in found.items() if record is not None}
+
+    def counts(self, name):
+        """Return the number of records per value of an index, without scanning"""
+        with self.lock:
+            return {value: len(bucket) for value, bucket in self.indexes[name].buckets.items()}
+
+    def lookup(self, name, values):
+        """
+        Map each given value of index `name` to the id of a record holding
+        it (the first in table order); values no record holds are left out.
+        Unique indexes answer with one hash lookup per value.
+        """
+        found = {}
+        if name in self.unique:
+            index = self.unique[name]
+            for value in values:
+                record_id = index.get(value)
+                if record_id is not None:
+                    found[value] = record_id
+            return found
+        index = self.indexes[name]
+        with self.lock:
+            for value in values:
+                bucket = index.get(value)
+                if bucket:
+                    found[value] = next(bucket.walk())
+        return found
+
+    def position(self, record_id):
+        """Return the view entry of a record, usable as a select() cursor"""
+        return self.view.positions.get(record_id)
+
+    def position_of(self, record):
+        """Return the view entry of a record as it is now, even if since deleted"""
+        return self.view.entry(record)
+
+    def select(self, after=None, **filters):
+        """
+        Yield the records matching every given index filter (None values
+        are ignored) in table order, walking the smallest matching bucket.
+        When `after` is a position entry, the walk starts right after it.
+        """
+        buckets = [self.indexes[name].get(value) for name, value in filters.items() if value is not None]
+        if not buckets:
+            ids = self.view.walk(after)
+        else:
+            buckets.sort(key=len)
+            ids = buckets[0].walk(after) if buckets[0] else ()
+        others = buckets[1:]
+        for record_id in ids:
+            if all(record_id in bucket for bucket in others):
+                record = self.get(record_id)
+                # Skip records deleted since their batch was copied
+                if record is not None:
+                    yield record
+
+@contextmanager
+def transaction(*stores):
+    """
+    Write to several stores as one unit. Memory stores are locked in name
+    order, so concurrent batches can't deadlock; SQL stores on the same
+    database share one database transaction.
+    """
+    with ExitStack() as stack:
+        for store in sorted(stores, key=lambda store: store.name):
+            stack.enter_context(store.transaction())
+        yield
+
+def create_repository(name, model, order=record_id, order_type=int, reverse=False, unique=None,
+                      collections=None, **indexes):
+    """
+    Create the store for a model. `indexes` maps each indexed attribute to
+    its value type (int or str), `unique` does the same for attributes
+    whose values must be unique, `order`/`order_type` give the sort key.
+    `collections` maps each attribute only ever grown through append() to
+    its (container type, item type), e.g. (list, Meeting).
+    Uses the SQL backend when DATABASE_URL is set, memory otherwise.
+    """
+    unique = unique or {}
+    database_url = os.environ.get("DATABASE_URL")
+    if database_url:
+        # Imported lazily so the in-memory backend doesn't need SQLAlchemy
+        from services.sql_repository import SqlRepository
+        return SqlRepository(database_url, name, model, order, order_type, reverse, unique, collections, **indexes)
+    # WAL_DIR makes the memory stores durable through a write-ahead log
+    from services.wal import get_journal
+    return MemoryRepository(name, order, reverse, unique, journal=get_journal(), collections=collections or (),
+                            order_type=order_type, **indexes)
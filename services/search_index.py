@@ -0,0 +1,125 @@
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+def fold(text):
+    """
+    Lowercase and strip accents, so "Liderança" and "lideranca" match
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+# Portuguese function words that would match nearly every document
+STOPWORDS = frozenset(fold(word) for word in """
+a as o os e é um uma uns umas de da das do dos em na nas no nos por pela pelas pelo
+pelos para pra com sem sobre entre que se ao aos à às ou mais mas como seu sua seus suas
+""".split())
+
+def tokenize(text):
+    if not text:
+        return []
+    return [token for token in TOKEN_PATTERN.findall(fold(text)) if len(token) > 1 and token not in STOPWORDS]
+
+class SearchIndex:
+    """
+    In-process inverted index. Documents are keyed by (kind, id) and made
+    of weighted text fields; each token maps to the documents containing
+    it with their weighted term frequency. A sorted vocabulary lets the
+    last query term match as a prefix (search-as-you-type).
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = {}   # token -> {doc key: weighted frequency}
+        self._documents = {}  # doc key -> (Counter of tokens, title)
+        self._vocabulary = []
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, kind, record_id, fields, title):
+        """
+        Index (or re-index) a document. `fields` is a list of (text, weight)
+        """
+        terms = Counter()
+        for text, weight in fields:
+            for token in tokenize(text):
+                terms[token] += weight
+
+        key = (kind, record_id)
+        with self._lock:
+            self._remove(key)
+            self._documents[key] = (terms, title)
+            for token, frequency in terms.items():
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    insort(self._vocabulary, token)
+                postings[key] = frequency
+
+    def remove(self, kind, record_id):
+        with self._lock:
+            self._remove((kind, record_id))
+
+    def clear(self, kind):
+        with self._lock:
+            for key in [key for key in self._documents if key[0] == kind]:
+                self._remove(key)
+
+    def _remove(self, key):
+        document = self._documents.pop(key, None)
+        if document is None:
+            return
+        for token in document[0]:
+            postings = self._postings[token]
+            del postings[key]
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    def _expand(self, token):
+        # Every vocabulary token starting with `token`
+        vocabulary = self._vocabulary
+        position = bisect_left(vocabulary, token)
+        matches = []
+        while position < len(vocabulary) and vocabulary[position].startswith(token):
+            matches.append(vocabulary[position])
+            position += 1
+        return matches
+
+    def search(self, query, kinds=None, limit=20):
+        """
+        Return up to `limit` (score, kind, id, title) tuples for documents
+        containing every query term, best first. The last term also matches
+        as a prefix. Scores add up TF-IDF over the matched tokens.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            total = len(self._documents)
+            scores = None
+            for position, term in enumerate(terms):
+                tokens = self._expand(term) if position == len(terms) - 1 else [term]
+                term_scores = {}
+                for token in tokens:
+                    postings = self._postings.get(token, {})
+                    idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for key, frequency in postings.items():
+                        if kinds is None or key[0] in kinds:
+                            term_scores[key] = term_scores.get(key, 0) + frequency * idf
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {key: score + term_scores[key] for key, score in scores.items() if key in term_scores}
+                if not scores:
+                    return []
+
+            best = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+            return [(score, key[0], key[1], self._documents[key][1]) for key, score in best]
@@ -0,0 +1,97 @@
+import threading
+
+from models import clients, initiatives, mentorships
+from services.search_index import SearchIndex
+import client_portal
+
+class Searchable:
+    """
+    A store exposed to search: its documents' weighted fields and title
+    """
+    def __init__(self, table, fields, title):
+        self.table = table
+        self.fields = fields
+        self.title = title
+
+SEARCHABLE = {
+    "clients": Searchable(
+        clients,
+        lambda client: [(client.name, 3), (client.email, 2), (client.notes, 1)],
+        lambda client: client.name
+    ),
+    "initiatives": Searchable(
+        initiatives,
+        lambda initiative: [(initiative.title, 3), (initiative.category, 2), (initiative.description, 1)],
+        lambda initiative: initiative.title
+    ),
+    "mentorships": Searchable(
+        mentorships,
+        lambda mentorship: [(mentorship.title, 3), (mentorship.description, 1)],
+        lambda mentorship: mentorship.title
+    ),
+    "podcasts": Searchable(
+        client_portal.podcast_episodes,
+        lambda episode: [(episode.title, 3), (episode.description, 2), (episode.summary, 1)],
+        lambda episode: episode.title
+    ),
+}
+
+search_index = SearchIndex()
+
+# Store version each kind was last indexed at; a mismatch (a write by
+# another worker sharing the SQL database) re-indexes that kind
+_indexed_versions = {}
+_build_lock = threading.Lock()
+
+def _index_record(kind, record):
+    searchable = SEARCHABLE[kind]
+    search_index.add(kind, record.id, searchable.fields(record), searchable.title(record))
+
+def _rebuild(kind):
+    searchable = SEARCHABLE[kind]
+    version = searchable.table.version
+    search_index.clear(kind)
+    for record in searchable.table.select():
+        _index_record(kind, record)
+    _indexed_versions[kind] = version
+
+def _listener(kind):
+    def on_change(event, record_id, record):
+        if kind not in _indexed_versions:
+            return  # not built yet; the first search indexes everything
+        if event == "delete":
+            search_index.remove(kind, record_id)
+        else:
+            _index_record(kind, record)
+        _indexed_versions[kind] = SEARCHABLE[kind].table.version
+    return on_change
+
+for _kind, _searchable in SEARCHABLE.items():
+    _searchable.table.subscribe(_listener(_kind))
+
+def ensure_indexed(kinds):
+    with _build_lock:
+        for kind in kinds:
+            if _indexed_versions.get(kind) != SEARCHABLE[kind].table.version:
+                _rebuild(kind)
+
+def search(query, types=None, limit=20):
+    """
+    Search clients, initiatives, mentorships and podcast episodes.
+    Matching ignores case and accents; results are ranked across types.
+    """
+    kinds = list(SEARCHABLE) if not types else types
+    unknown = [kind for kind in kinds if kind not in SEARCHABLE]
+    if unknown:
+        raise ValueError(f"Unknown search types: {', '.join(unknown)}")
+    limit = min(max(int(limit), 1), 100)
+
+    ensure_indexed(kinds)
+    results = search_index.search(query or "", set(kinds), limit)
+    return {
+        "query": query,
+        "results": [
+            {"type": kind, "id": record_id, "title": title, "score": round(score, 4)}
+            for score, kind, record_id, title in results
+        ]
+    }
@@ -0,0 +1,557 @@
+from contextlib import contextmanager, nullcontext
+from datetime import date, datetime
+from enum import Enum
+import json
+import os
+import sys
+import threading
+import time
+
+from sqlalchemy import (
+    Column, Index, Integer, MetaData, String, Table, Text,
+    and_, create_engine, delete, func, insert, inspect, or_, select, text, update
+)
+from sqlalchemy.exc import DatabaseError
+
+from services.repository import Repository, UniqueViolation, normalize_value
+
+# Rows fetched per round trip while walking a select()
+SELECT_BATCH_SIZE = 100
+
+# Tries at creating or upgrading the schema: workers starting together on
+# a fresh database race to do it, and a loser finds it done when it retries
+SETUP_ATTEMPTS = 5
+
+COLUMN_TYPES = {
+    int: Integer,
+    str: lambda: String(255),
+}
+
+metadata = MetaData()
+
+# One row per store holding the last id handed out, so ids stay unique
+# across every worker sharing the database, and one "<store>.version" row
+# per store counting its writes
+id_counters = Table(
+    "id_counters", metadata,
+    Column("name", String(64), primary_key=True),
+    Column("value", Integer, nullable=False),
+)
+
+_engines = {}
+
+# Payloads are JSON. Values JSON has no type for are tagged objects with a
+# "$" key; stored dicts that have "$" keys of their own are wrapped in one
+
+def encode_value(value):
+    if isinstance(value, Enum):
+        return {"$enum": type(value).__name__, "value": value.value}
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, (list, tuple)):
+        return [encode_value(item) for item in value]
+    if isinstance(value, dict):
+        encoded = {key: encode_value(item) for key, item in value.items()}
+        if any(key.startswith("$") for key in value):
+            return {"$dict": encoded}
+        return encoded
+    return value
+
+def decode_value(value, enums):
+    """Inverse of encode_value; `enums` maps the Enum names it may meet to their class"""
+    if isinstance(value, list):
+        return [decode_value(item, enums) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if "$datetime" in value:
+        return datetime.fromisoformat(value["$datetime"])
+    if "$date" in value:
+        return date.fromisoformat(value["$date"])
+    if "$enum" in value:
+        return enums[value["$enum"]](value["value"])
+    if "$dict" in value:
+        value = value["$dict"]
+    return {key: decode_value(item, enums) for key, item in value.items()}
+
+def module_enums(*classes):
+    """The Enums defined next to the given classes, by name"""
+    enums = {}
+    for cls in classes:
+        for name, value in vars(sys.modules[cls.__module__]).items():
+            if isinstance(value, type) and issubclass(value, Enum):
+                enums[name] = value
+    return enums
+
+def slot_names(cls):
+    return [name for klass in cls.__mro__ for name in getattr(klass, "__slots__", ())]
+
+# Per thread: engine -> connection of the transaction() in progress, which
+# every store on that engine reads and writes through until it ends
+_active = threading.local()
+
+def active_connections():
+    if not hasattr(_active, "connections"):
+        _active.connections = {}
+    return _active.connections
+
+def get_engine(database_url):
+    """
+    Return the pooled engine for a database URL, creating it on first use
+    """
+    # Render/Heroku still hand out the pre-SQLAlchemy-1.4 scheme
+    if database_url.startswith("postgres://"):
+        database_url = "postgresql://" + database_url[len("postgres://"):]
+
+    engine = _engines.get(database_url)
+    if engine is None:
+        options = {"pool_pre_ping": True}
+        if not database_url.startswith("sqlite"):
+            options.update(
+                pool_size=int(os.environ.get("DATABASE_POOL_SIZE", 5)),
+                max_overflow=int(os.environ.get("DATABASE_MAX_OVERFLOW", 10)),
+                pool_recycle=1800,
+            )
+        engine = _engines[database_url] = create_engine(database_url, **options)
+    return engine
+
+class SqlRepository(Repository):
+    """
+    SQLAlchemy backend (SQLite locally, Postgres in production).
+    Each store is a table with the record id, its sort key and its indexed
+    attributes as real columns, plus the record's other fields as a JSON
+    payload. Collections grown by append() live in a "<store>_items"
+    table, one row per item, so appending never rewrites the record.
+    Composite (attribute, sort_key, id) indexes let filtered, ordered
+    walks run as index range scans with keyset pagination, and unique
+    attributes get unique indexes (NULLs, i.e. None values, may repeat).
+    Indexed columns a model gains later are added, and filled, at startup.
+    """
+    def __init__(self, database_url, name, model, order, order_type, reverse, unique=None, collections=None,
+                 **indexes):
+        self.engine = get_engine(database_url)
+        self.name = name
+        self.model = model
+        self.key = order
+        self.reverse = reverse
+        self.order_type = order_type
+        self.unique = list(unique or {})
+        self.attributes = list(indexes) + self.unique
+        self.collections = collections or {}
+        self.enums = module_enums(model, *(item_type for _, item_type in self.collections.values()))
+        self.version_counter = f"{name}.version"
+        self.listeners = []
+        self.pending = threading.local()
+
+        columns = [
+            Column("id", Integer, primary_key=True, autoincrement=False),
+            Column("sort_key", COLUMN_TYPES[order_type](), nullable=False),
+        ]
+        for attribute, value_type in {**indexes, **(unique or {})}.items():
+            columns.append(Column(attribute, COLUMN_TYPES[value_type]()))
+        columns.append(Column("payload", Text, nullable=False))
+
+        table_indexes = [Index(f"ix_{name}_order", "sort_key", "id")]
+        for attribute in indexes:
+            table_indexes.append(Index(f"ix_{name}_{attribute}", attribute, "sort_key", "id"))
+        for attribute in self.unique:
+            table_indexes.append(Index(f"uq_{name}_{attribute}", attribute, unique=True))
+
+        self.table = Table(name, metadata, *columns, *table_indexes)
+        self.tables = [id_counters, self.table]
+        self.items = None
+        if self.collections:
+            # Item `seq` is its position in the record's collection
+            self.items = Table(
+                f"{name}_items", metadata,
+                Column("record_id", Integer, primary_key=True, autoincrement=False),
+                Column("field", String(64), primary_key=True),
+                Column("seq", Integer, primary_key=True, autoincrement=False),
+                Column("payload", Text, nullable=False),
+            )
+            self.tables.append(self.items)
+        self._setup()
+
+    def _setup(self):
+        for attempt in range(SETUP_ATTEMPTS):
+            try:
+                metadata.create_all(self.engine, tables=self.tables)
+                self._add_missing_columns()
+                self._init_counter(self.name, lambda connection: connection.execute(
+                    select(func.max(self.table.c.id))
+                ).scalar() or 0)
+                self._init_counter(self.version_counter, lambda connection: 0)
+                return
+            except DatabaseError:
+                # Another worker created the same table, column or row first
+                if attempt == SETUP_ATTEMPTS - 1:
+                    raise
+                time.sleep(0.1 * (attempt + 1))
+
+    def _add_missing_columns(self):
+        """Add the indexed columns an existing table lacks, filled from the payloads"""
+        with self.engine.begin() as connection:
+            existing = {column["name"] for column in inspect(connection).get_columns(self.name)}
+            missing = [attribute for attribute in self.attributes if attribute not in existing]
+            if not missing:
+                return
+            for attribute in missing:
+                column_type = self.table.c[attribute].type.compile(dialect=self.engine.dialect)
+                connection.execute(text(f"ALTER TABLE {self.name} ADD COLUMN {attribute} {column_type}"))
+            rows = connection.execute(select(self.table.c.id, self.table.c.payload)).all()
+            for row in rows:
+                record = self._record(row.payload, {})
+                connection.execute(
+                    update(self.table).where(self.table.c.id == row.id).values(**{
+                        attribute: normalize_value(getattr(record, attribute)) for attribute in missing
+                    })
+                )
+            for index in self.table.indexes:
+                if any(attribute in index.columns for attribute in missing):
+                    index.create(connection)
+
+    def _init_counter(self, name, initial):
+        with self.engine.begin() as connection:
+            exists = connection.execute(select(id_counters.c.value).where(id_counters.c.name == name)).first()
+            if exists is None:
+                # A worker racing here fails on the primary key, and retries
+                connection.execute(insert(id_counters).values(name=name, value=initial(connection)))
+
+    def _bump_version(self, connection):
+        return connection.execute(
+            update(id_counters)
+            .where(id_counters.c.name == self.version_counter)
+            .values(value=id_counters.c.value + 1)
+            .returning(id_counters.c.value)
+        ).scalar_one()
+
+    def _row(self, record):
+        state = {name: value for name, value in record.__getstate__().items() if name not in self.collections}
+        row = {
+            "id": record.id,
+            "sort_key": self.key(record),
+            "payload": json.dumps(encode_value(state), ensure_ascii=False),
+        }
+        for attribute in self.attributes:
+            row[attribute] = normalize_value(getattr(record, attribute))
+        return row
+
+    def _item_row(self, record_id, field, seq, item):
+        state = {name: getattr(item, name) for name in slot_names(type(item)) if hasattr(item, name)}
+        return {
+            "record_id": record_id,
+            "field": field,
+            "seq": seq,
+            "payload": json.dumps(encode_value(state), ensure_ascii=False),
+        }
+
+    def _item_rows(self, records):
+        return [
+            self._item_row(record.id, field, seq, item)
+            for record in records
+            for field in self.collections
+            for seq, item in enumerate(getattr(record, field))
+        ]
+
+    def _record(self, payload, items):
+        """Rebuild a record from its payload and {field: [item payloads in order]}"""
+        record = self.model.__new__(self.model)
+        record.__setstate__(decode_value(json.loads(payload), self.enums))
+        for field, (container_type, item_type) in self.collections.items():
+            container = container_type()
+            for item_payload in items.get(field, ()):
+                item = item_type.__new__(item_type)
+                for name, value in decode_value(json.loads(item_payload), self.enums).items():
+                    setattr(item, name, value)
+                container.append(item)
+            setattr(record, field, container)
+        return record
+
+    def _records(self, connection, rows):
+        """Rebuild the records of (id, payload) rows, loading their items in one query"""
+        items = {}
+        if self.items is not None and rows:
+            item_rows = connection.execute(
+                select(self.items.c.record_id, self.items.c.field, self.items.c.payload)
+                .where(self.items.c.record_id.in_([row.id for row in rows]))
+                .order_by(self.items.c.record_id, self.items.c.field, self.items.c.seq)
+            ).all()
+            for item_row in item_rows:
+                items.setdefault(item_row.record_id, {}).setdefault(item_row.field, []).append(item_row.payload)
+        return [self._record(row.payload, items.get(row.id, {})) for row in rows]
+
+    def _check_unique(self, connection, records):
+        # Checked in the writing transaction so the error names the clash;
+        # the unique indexes still reject whatever races past the check
+        for attribute in self.unique:
+            column = self.table.c[attribute]
+            claimed = {}
+            for record in records:
+                value = normalize_value(getattr(record, attribute))
+                if value is None:
+                    continue
+                if claimed.get(value, record.id) != record.id:
+                    raise UniqueViolation(attribute, value, claimed[value])
+                claimed[value] = record.id
+            if not claimed:
+                continue
+            holders = connection.execute(
+                select(column, self.table.c.id).where(column.in_(list(claimed)))
+            ).all()
+            for value, holder in holders:
+                if holder != claimed[value]:
+                    raise UniqueViolation(attribute, value, holder)
+
+    def _begin(self):
+        connection = active_connections().get(self.engine)
+        return self.engine.begin() if connection is None else nullcontext(connection)
+
+    def _connect(self):
+        connection = active_connections().get(self.engine)
+        return self.engine.connect() if connection is None else nullcontext(connection)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run the writes (and reads) of this thread, on every store sharing
+        the database, in one database transaction; an error rolls it back
+        """
+        with self.deferred_notifications():
+            connections = active_connections()
+            if self.engine in connections:
+                yield
+                return
+            with self.engine.begin() as connection:
+                connections[self.engine] = connection
+                try:
+                    yield
+                finally:
+                    del connections[self.engine]
+
+    def lock_writes(self):
+        """
+        Take the write lock on the store's version counter row until the
+        transaction() ends: row lock on Postgres, database write lock on
+        SQLite. Every write of the store bumps that row, so it waits too.
+        """
+        connection = active_connections().get(self.engine)
+        if connection is None:
+            raise RuntimeError("lock_writes() must be called inside transaction()")
+        connection.execute(
+            update(id_counters)
+            .where(id_counters.c.name == self.version_counter)
+            .values(value=id_counters.c.value)
+        )
+
+    def _entry(self, sort_key, record_id):
+        return (sort_key, -record_id if self.reverse else record_id)
+
+    def allocate_id(self):
+        with self._begin() as connection:
+            return connection.execute(
+                update(id_counters)
+                .where(id_counters.c.name == self.name)
+                .values(value=id_counters.c.value + 1)
+                .returning(id_counters.c.value)
+            ).scalar_one()
+
+    # Writes stamp the record with the store's new version, so record
+    # versions are unique across every worker sharing the database
+
+    def allocate_ids(self, count):
+        if count == 0:
+            return []
+        with self._begin() as connection:
+            last_id = connection.execute(
+                update(id_counters)
+                .where(id_counters.c.name == self.name)
+                .values(value=id_counters.c.value + count)
+                .returning(id_counters.c.value)
+            ).scalar_one()
+        return list(range(last_id - count + 1, last_id + 1))
+
+    def add_many(self, records):
+        """Insert a batch of records in one transaction with one executemany"""
+        if not records:
+            return records
+        with self._begin() as connection:
+            self._check_unique(connection, records)
+            version = self._bump_version(connection)
+            for record in records:
+                record.version = version
+            connection.execute(insert(self.table), [self._row(record) for record in records])
+            item_rows = self._item_rows(records) if self.items is not None else []
+            if item_rows:
+                connection.execute(insert(self.items), item_rows)
+        for record in records:
+            self.notify("add", record.id, record)
+        return records
+
+    def add(self, record):
+        with self._begin() as connection:
+            self._check_unique(connection, [record])
+            record.version = self._bump_version(connection)
+            connection.execute(insert(self.table).values(**self._row(record)))
+            item_rows = self._item_rows([record]) if self.items is not None else []
+            if item_rows:
+                connection.execute(insert(self.items), item_rows)
+        self.notify("add", record.id, record)
+        return record
+
+    def save(self, record):
+        with self._begin() as connection:
+            self._check_unique(connection, [record])
+            record.version = self._bump_version(connection)
+            row = self._row(record)
+            connection.execute(update(self.table).where(self.table.c.id == row.pop("id")).values(**row))
+        self.notify("save", record.id, record)
+        return record
+
+    def append(self, record, field, item):
+        """
+        Append `item` to the record's collection `field`, then store the
+        record's fields and that one item, numbered after the items
+        already stored (another worker may have appended some since this
+        copy of the record was loaded)
+        """
+        items = self.items
+        getattr(record, field).append(item)
+        with self._begin() as connection:
+            record.version = self._bump_version(connection)
+            row = self._row(record)
+            result = connection.execute(update(self.table).where(self.table.c.id == row.pop("id")).values(**row))
+            if result.rowcount == 0:
+                return item
+            seq = connection.execute(
+                select(func.coalesce(func.max(items.c.seq) + 1, 0))
+                .where(items.c.record_id == record.id, items.c.field == field)
+            ).scalar_one()
+            if hasattr(item, "id"):
+                item.id = seq
+            connection.execute(insert(items).values(**self._item_row(record.id, field, seq, item)))
+        self.notify("save", record.id, record)
+        return item
+
+    def delete(self, record_id):
+        with self._begin() as connection:
+            result = connection.execute(delete(self.table).where(self.table.c.id == record_id))
+            if self.items is not None:
+                connection.execute(delete(self.items).where(self.items.c.record_id == record_id))
+            if result.rowcount > 0:
+                self._bump_version(connection)
+        if result.rowcount > 0:
+            self.notify("delete", record_id)
+        return result.rowcount > 0
+
+    @property
+    def version(self):
+        with self._connect() as connection:
+            return connection.execute(
+                select(id_counters.c.value).where(id_counters.c.name == self.version_counter)
+            ).scalar_one()
+
+    def version_of(self, record_id):
+        record = self.get(record_id)
+        return None if record is None else record.version
+
+    def get(self, record_id, default=None):
+        with self._connect() as connection:
+            rows = connection.execute(
+                select(self.table.c.id, self.table.c.payload).where(self.table.c.id == record_id)
+            ).all()
+            records = self._records(connection, rows)
+        return records[0] if records else default
+
+    def __getitem__(self, record_id):
+        record = self.get(record_id)
+        if record is None:
+            raise KeyError(record_id)
+        return record
+
+    def __contains__(self, record_id):
+        with self._connect() as connection:
+            return connection.execute(
+                select(self.table.c.id).where(self.table.c.id == record_id)
+            ).first() is not None
+
+    def __len__(self):
+        with self._connect() as connection:
+            return connection.execute(select(func.count()).select_from(self.table)).scalar_one()
+
+    def values(self):
+        return self.select()
+
+    def get_many(self, record_ids):
+        """Load every requested record with a single IN (...) query"""
+        record_ids = list(record_ids)
+        if not record_ids:
+            return {}
+        with self._connect() as connection:
+            rows = connection.execute(
+                select(self.table.c.id, self.table.c.payload).where(self.table.c.id.in_(record_ids))
+            ).all()
+            records = self._records(connection, rows)
+        return {record.id: record for record in records}
+
+    def counts(self, name):
+        column = self.table.c[name]
+        with self._connect() as connection:
+            rows = connection.execute(select(column, func.count()).group_by(column)).all()
+        return {value: count for value, count in rows}
+
+    def lookup(self, name, values):
+        """One IN (...) query mapping each value to the first record holding it"""
+        column = self.table.c[name]
+        values = [normalize_value(value) for value in values]
+        if not values:
+            return {}
+        found = {}
+        with self._connect() as connection:
+            rows = connection.execute(
+                select(column, self.table.c.id).where(column.in_(values)).order_by(self.table.c.id)
+            ).all()
+        for value, record_id in rows:
+            found.setdefault(value, record_id)
+        return found
+
+    def position(self, record_id):
+        with self._connect() as connection:
+            sort_key = connection.execute(
+                select(self.table.c.sort_key).where(self.table.c.id == record_id)
+            ).scalar()
+        return None if sort_key is None else self._entry(sort_key, record_id)
+
+    def position_of(self, record):
+        return self._entry(self.key(record), record.id)
+
+    def select(self, after=None, **filters):
+        """
+        Yield matching records in store order, fetching SELECT_BATCH_SIZE
+        rows per query with keyset pagination from the `after` entry
+        """
+        table = self.table
+        conditions = [
+            table.c[name] == normalize_value(value)
+            for name, value in filters.items() if value is not None
+        ]
+        if self.reverse:
+            ordering = (table.c.sort_key.desc(), table.c.id.asc())
+        else:
+            ordering = (table.c.sort_key.asc(), table.c.id.asc())
+
+        while True:
+            query = select(table.c.id, table.c.sort_key, table.c.payload).where(*conditions)
+            if after is not None:
+                sort_key, last_id = after[0], abs(after[1])
+                beyond = table.c.sort_key < sort_key if self.reverse else table.c.sort_key > sort_key
+                query = query.where(or_(beyond, and_(table.c.sort_key == sort_key, table.c.id > last_id)))
+
+            with self._connect() as connection:
+                rows = connection.execute(query.order_by(*ordering).limit(SELECT_BATCH_SIZE)).all()
+                records = self._records(connection, rows)
+
+            yield from records
+            if len(rows) < SELECT_BATCH_SIZE:
+                return
+            after = self._entry(rows[-1].sort_key, rows[-1].id)
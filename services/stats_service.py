@@ -0,0 +1,33 @@
+from models import (
+    clients, initiatives, mentorships, initiative_categories,
+    ClientStatus, InitiativeStatus, MentorshipStatus
+)
+
+def _status_counts(table, statuses):
+    counts = {status.value: 0 for status in statuses}
+    counts.update(table.counts("status"))
+    return counts
+
+def get_stats():
+    """
+    Get record counts per status/category, read from the index buckets
+    that every service-layer mutation keeps up to date
+    """
+    category_counts = {category: 0 for category in initiative_categories}
+    category_counts.update(initiatives.counts("category"))
+    
+    return {
+        "clients": {
+            "total": len(clients),
+            "by_status": _status_counts(clients, ClientStatus)
+        },
+        "initiatives": {
+            "total": len(initiatives),
+            "by_status": _status_counts(initiatives, InitiativeStatus),
+            "by_category": category_counts
+        },
+        "mentorships": {
+            "total": len(mentorships),
+            "by_status": _status_counts(mentorships, MentorshipStatus)
+        }
+    }
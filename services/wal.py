@@ -0,0 +1,393 @@
+"""
+Write-ahead log for the in-memory stores.
+
+Every write a MemoryRepository applies is appended to the log as a
+frame (pickled): the record's after-image for adds and plain saves,
+but for stores with growing collections (a service's chat, meetings...)
+a save logs only the record's other fields and an append only the new
+item, so a frame's size never depends on the history. Acknowledged writes
+survive a restart: writers append to a shared buffer and wait until a
+flusher thread has written and fsynced it, so one fsync covers every
+write that arrived while the previous one ran (group commit).
+
+Layout of WAL_DIR:
+    wal.<segment>.log        frames: header (payload length, crc32,
+                             transaction id, kind) + pickled payload
+    snapshot.<segment>.pkl   each store's highest logged id, then every
+                             store's records as of the start of that
+                             segment; older segments are deleted
+
+Frames written inside a transaction carry its id and only count once
+its commit frame is in the log; frames outside one carry id 0. Recovery
+reads the newest snapshot, then replays the segments after it in order
+(a torn frame at the tail, from a crash mid-write, ends the log there),
+keeping each record's latest image, and loads every store in one go.
+Ids continue after the highest one the snapshot or any frame names, so
+a deleted record's id is never reused.
+
+One process owns a WAL_DIR: recover() locks it (flock on WAL_DIR/LOCK)
+and fails if another process holds it, since two writers would
+interleave frames in the same segment.
+"""
+from contextlib import contextmanager
+import fcntl
+import glob
+import itertools
+import logging
+import os
+import pickle
+import re
+import struct
+import threading
+import time
+import zlib
+
+# Payload length, crc32 of the rest of the frame, transaction id, kind
+HEADER = struct.Struct("<IIQB")
+WRITE, COMMIT = 1, 2
+
+# Log bytes after which a snapshot compacts the log
+SNAPSHOT_BYTES = int(os.environ.get("WAL_SNAPSHOT_BYTES", 64 * 1024 * 1024))
+
+# Records pickled per store lock hold while writing a snapshot
+SNAPSHOT_BATCH_SIZE = 512
+
+SEGMENT_NAME = re.compile(r"(?:wal|snapshot)\.(\d+)\.(?:log|pkl)$")
+
+def segment_number(path):
+    return int(SEGMENT_NAME.search(path).group(1))
+
+def frame(kind, txid, payload):
+    body = struct.pack("<QB", txid, kind) + payload
+    return HEADER.pack(len(payload), zlib.crc32(body), txid, kind) + payload
+
+def read_frames(data):
+    """
+    Yield (kind, txid, payload, end offset) for each intact frame of a
+    segment, stopping at the first torn or corrupt one
+    """
+    offset = 0
+    view = memoryview(data)
+    while offset + HEADER.size <= len(data):
+        length, checksum, txid, kind = HEADER.unpack_from(data, offset)
+        end = offset + HEADER.size + length
+        if end > len(data):
+            return
+        payload = view[offset + HEADER.size:end]
+        if zlib.crc32(payload, zlib.crc32(struct.pack("<QB", txid, kind))) != checksum:
+            return
+        yield kind, txid, payload, end
+        offset = end
+
+class WriteAheadLog:
+    """
+    The log shared by every in-memory store of the process
+    """
+    def __init__(self, directory, group_commit_ms=0):
+        self.directory = directory
+        self.group_commit_delay = group_commit_ms / 1000
+        self.stores = {}  # store name -> MemoryRepository
+
+        self.lock = threading.Lock()  # buffer and counters
+        self.io_lock = threading.Lock()  # the segment file; taken before `lock`
+        self.has_data = threading.Condition(self.lock)
+        self.flushed = threading.Condition(self.lock)
+        self.buffer = bytearray()
+        self.appended = 0  # bytes appended since the process started
+        self.durable = 0  # ...of which written and fsynced
+        self.segment_bytes = 0
+        self.segment = None
+        self.file = None
+        self.flusher = None
+        self.snapshotting = False
+        self.lock_file = None  # held open for the life of the process
+        self.owner = None  # id of the process holding it
+
+        self.local = threading.local()
+        self.txids = itertools.count(1)
+
+    def register(self, store):
+        self.stores[store.name] = store
+
+    # Writing
+
+    def log(self, entries):
+        """
+        Append (store name, op, record id, payload) entries; call it under
+        the store's lock, so the log keeps each record's write order.
+        Payloads by op: "add"/"save" the record, "delete" None, "fields"
+        the record's state without its collections, "append" a
+        (field, position, item, fields) tuple.
+        Returns the position to wait() for, or None inside a transaction
+        (whose commit is waited for when it ends).
+        """
+        txid = getattr(self.local, "txid", None)
+        if txid is not None:
+            self.local.wrote = True
+            self.append([frame(WRITE, txid, pickle.dumps(entry, protocol=5)) for entry in entries])
+            return None
+        if len(entries) == 1:
+            return self.append([frame(WRITE, 0, pickle.dumps(entries[0], protocol=5))])
+        # Several entries (add_many) form their own transaction
+        txid = next(self.txids)
+        frames = [frame(WRITE, txid, pickle.dumps(entry, protocol=5)) for entry in entries]
+        return self.append(frames + [frame(COMMIT, txid, b"")])
+
+    @contextmanager
+    def transaction(self):
+        """
+        Make this thread's writes one unit: replayed all together or not
+        at all. Nested blocks join the outermost one.
+        """
+        if getattr(self.local, "txid", None) is not None:
+            yield
+            return
+        self.local.txid = next(self.txids)
+        self.local.wrote = False
+        try:
+            yield
+        finally:
+            txid, wrote = self.local.txid, self.local.wrote
+            self.local.txid = None
+            # Memory writes are never rolled back, so even a failed block
+            # commits what it applied
+            if wrote:
+                self.wait(self.append([frame(COMMIT, txid, b"")]))
+
+    def append(self, frames):
+        with self.lock:
+            if self.file is None:
+                raise RuntimeError("The write-ahead log must be recovered before the first write")
+            if os.getpid() != self.owner:
+                # A fork (e.g. gunicorn --preload) inherits the lock but not the flusher
+                raise RuntimeError("The write-ahead log belongs to the process that recovered it")
+            if self.flusher is None:
+                self.flusher = threading.Thread(target=self.flush_forever, name="wal-flusher", daemon=True)
+                self.flusher.start()
+            for data in frames:
+                self.buffer += data
+                self.appended += len(data)
+            self.has_data.notify()
+            return self.appended
+
+    def wait(self, position):
+        """Block until the log is durable up to `position`"""
+        if position is None:
+            return
+        with self.lock:
+            while self.durable < position:
+                self.flushed.wait()
+
+    def flush_forever(self):
+        while True:
+            with self.lock:
+                while not self.buffer:
+                    self.has_data.wait()
+            if self.group_commit_delay:
+                time.sleep(self.group_commit_delay)
+            self.flush()
+
+    def flush(self):
+        """Write and fsync everything appended so far, waking its writers"""
+        with self.io_lock:
+            with self.lock:
+                data, target = bytes(self.buffer), self.appended
+                self.buffer.clear()
+            if data:
+                self.file.write(data)
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            with self.lock:
+                self.durable = max(self.durable, target)
+                self.segment_bytes += len(data)
+                self.flushed.notify_all()
+                compact = self.segment_bytes >= SNAPSHOT_BYTES and not self.snapshotting
+                if compact:
+                    self.snapshotting = True
+        if compact:
+            threading.Thread(target=self.snapshot, name="wal-snapshot", daemon=True).start()
+
+    def open_segment(self, number):
+        self.segment = number
+        self.file = open(os.path.join(self.directory, f"wal.{number}.log"), "ab")
+        self.segment_bytes = self.file.tell()
+
+    def rotate(self):
+        """Start a new segment; returns its number"""
+        with self.io_lock:
+            with self.lock:
+                data, target = bytes(self.buffer), self.appended
+                self.buffer.clear()
+            self.file.write(data)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+            self.open_segment(self.segment + 1)
+            with self.lock:
+                self.durable = max(self.durable, target)
+                self.flushed.notify_all()
+            return self.segment
+
+    # Snapshots
+
+    def snapshot(self):
+        """
+        Write every store's records to a snapshot and drop the segments it
+        covers. Writers keep going meanwhile: a record saved while the
+        snapshot is written may be captured newer than the new segment's
+        start, which is harmless: replay reapplies after-images and fields
+        in order, and skips appends whose position the record already has.
+        """
+        try:
+            started = time.perf_counter()
+            number = self.rotate()
+            # Every write in the older segments was logged before rotate()
+            last_ids = {name: store.last_id for name, store in self.stores.items()}
+            path = os.path.join(self.directory, f"snapshot.{number}.pkl")
+            with open(path + ".tmp", "wb") as snapshot_file:
+                snapshot_file.write(pickle.dumps(last_ids, protocol=5))
+                for name, store in self.stores.items():
+                    for batch in store.batches(SNAPSHOT_BATCH_SIZE):
+                        # Under the lock, so no append lands mid-pickle
+                        with store.lock:
+                            data = pickle.dumps((name, batch), protocol=5)
+                        snapshot_file.write(data)
+                snapshot_file.flush()
+                os.fsync(snapshot_file.fileno())
+            os.replace(path + ".tmp", path)
+
+            for old in glob.glob(os.path.join(self.directory, "*.*")):
+                if SEGMENT_NAME.search(old) and segment_number(old) < number:
+                    os.remove(old)
+            logging.info(f"WAL snapshot {number} written in {time.perf_counter() - started:.2f}s")
+            return path
+        finally:
+            with self.lock:
+                self.snapshotting = False
+
+    # Recovery
+
+    def recover(self):
+        """
+        Load the newest snapshot and replay the log after it into the
+        registered stores, then open a segment for new writes.
+        Returns the numbers of records loaded and of writes replayed.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self.lock_directory()
+        paths = glob.glob(os.path.join(self.directory, "*.*"))
+        snapshots = sorted((p for p in paths if p.endswith(".pkl")), key=segment_number)
+        start = segment_number(snapshots[-1]) if snapshots else 0
+
+        # Store name -> {record id: record}, the snapshot's then the log's
+        # latest image of each record, loaded into the stores at the end
+        state = {name: {} for name in self.stores}
+        last_ids = {}  # store name -> highest id logged
+        loaded = 0
+        if snapshots:
+            with open(snapshots[-1], "rb") as snapshot_file:
+                while True:
+                    try:
+                        entry = pickle.load(snapshot_file)
+                    except EOFError:
+                        break
+                    if isinstance(entry, dict):
+                        last_ids.update(entry)
+                        continue
+                    name, batch = entry
+                    loaded += len(batch)
+                    records = state.setdefault(name, {})
+                    for record in batch:
+                        records[record.id] = record
+
+        segments = sorted(
+            (p for p in paths if p.endswith(".log") and segment_number(p) >= start),
+            key=segment_number
+        )
+        frames = []
+        committed = {0}
+        log_bytes = 0
+        for path in segments:
+            with open(path, "rb") as segment_file:
+                data = segment_file.read()
+            log_bytes += len(data)
+            end = 0
+            for kind, txid, payload, end in read_frames(data):
+                if kind == COMMIT:
+                    committed.add(txid)
+                else:
+                    frames.append((txid, payload))
+            if end < len(data):
+                # A crash tore the last frame: cut it off before appending
+                logging.warning(f"WAL {path}: dropping {len(data) - end} bytes of torn tail")
+                with open(path, "r+b") as segment_file:
+                    segment_file.truncate(end)
+
+        replayed = 0
+        for txid, payload in frames:
+            name, op, record_id, value = pickle.loads(payload)
+            # Uncommitted frames count too: their ids may have been seen
+            last_ids[name] = max(last_ids.get(name, 0), record_id)
+            if txid in committed:
+                replay(state.setdefault(name, {}), op, record_id, value)
+                replayed += 1
+        for name, store in self.stores.items():
+            store.load(list(state[name].values()))
+            store.recovered(last_ids.get(name, 0))
+
+        self.txids = itertools.count(max(committed | {txid for txid, _ in frames}) + 1)
+        self.open_segment(segment_number(segments[-1]) if segments else start)
+        if log_bytes >= SNAPSHOT_BYTES:
+            self.snapshot()
+        return {"records": loaded, "replayed": replayed}
+
+    def lock_directory(self):
+        """Take the directory's exclusive lock, or fail if another process has it"""
+        if self.lock_file is not None:
+            return
+        lock_file = open(os.path.join(self.directory, "LOCK"), "a")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise RuntimeError(
+                f"WAL_DIR {self.directory} is in use by another process: run a single worker "
+                "(without the reloader) per log directory"
+            ) from None
+        self.lock_file = lock_file
+        self.owner = os.getpid()
+
+def replay(records, op, record_id, value):
+    """Apply one logged write to a store's {record id: record}"""
+    if op == "delete":
+        records.pop(record_id, None)
+    elif op in ("add", "save"):
+        records[record_id] = value
+    else:
+        record = records.get(record_id)
+        if record is None:
+            return
+        if op == "append":
+            field, position, item, value = value
+            collection = getattr(record, field)
+            # The record may come from a snapshot taken after this append
+            if len(collection) == position:
+                collection.append(item)
+        for name, field_value in value.items():
+            setattr(record, name, field_value)
+
+_journal = None
+_journal_lock = threading.Lock()
+
+def get_journal():
+    """
+    Return the process's write-ahead log when WAL_DIR is set, else None
+    """
+    global _journal
+    directory = os.environ.get("WAL_DIR")
+    if not directory:
+        return None
+    with _journal_lock:
+        if _journal is None:
+            _journal = WriteAheadLog(directory, float(os.environ.get("WAL_GROUP_COMMIT_MS", 0)))
+        return _journal
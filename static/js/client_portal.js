@@ -621,7 +621,7 @@ function loadChatHistory(chatHistory) {
         chatHTML += `
             <div class="message ${messageClass}">
                 <div class="message-content">
-                    <strong>${senderName}:</strong> ${message.message}
+                    <strong>${senderName}:</strong> ${escapeHtml(message.message)}
                 </div>
                 <div class="message-timestamp">${formattedDate} às ${formattedTime}</div>
             </div>
@@ -729,36 +729,30 @@ function requestScopeChanges() {
 
 // Open chat modal
 function openChatModal() {
-    // Load chat messages to modal
     const serviceId = document.querySelector('.service-item.active').getAttribute('data-service-id');
-    const service = sampleClientServices.find(svc => svc.id == serviceId);
-    
-    if (!service || !service.chatHistory) {
-        return;
-    }
-    
     const chatMessages = document.getElementById('chat-messages');
-    let messagesHTML = '';
-    
-    service.chatHistory.forEach(message => {
-        // Format timestamp
-        const messageTime = new Date(message.timestamp);
-        const formattedTime = messageTime.toLocaleTimeString('pt-BR', { hour: '2-digit', minute: '2-digit' });
-        
-        const messageClass = message.sender === 'client' ? 'message-user' : 'message-other';
-        const senderName = message.sender === 'client' ? 'Você' : 'Ana Rosa';
-        
-        messagesHTML += `
-            <div class="message ${messageClass}">
-                <div class="message-content">
-                    <strong>${senderName}:</strong> ${message.message}
-                </div>
-                <div class="message-timestamp">${formattedTime}</div>
-            </div>
-        `;
-    });
-    
-    chatMessages.innerHTML = messagesHTML;
+    chatMessages.innerHTML = '';
+    
+    // Load the latest page of the conversation, then follow it from the last message shown
+    fetch(`/api/client-portal/services/${serviceId}/chat`)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Network response was not ok');
+            }
+            return response.json();
+        })
+        .then(page => {
+            chatMessages.innerHTML = page.messages.map(renderChatMessage).join('');
+            chatMessages.scrollTop = chatMessages.scrollHeight;
+            
+            const lastMessage = page.messages[page.messages.length - 1];
+            subscribeToChat(serviceId, lastMessage ? lastMessage.id : null);
+        })
+        .catch(error => {
+            console.error('Error loading chat messages:', error);
+            showAlert('error', 'Erro ao carregar mensagens. Por favor, tente novamente.');
+        });
+    $('#chatModal').one('hidden.bs.modal', closeChatStream);
     
     // Show the modal
     $('#chatModal').modal('show');
@@ -767,6 +761,55 @@ function openChatModal() {
     document.getElementById('chat-input').focus();
 }
 
+// Escape text written by users before it is inserted as HTML
+function escapeHtml(text) {
+    const element = document.createElement('div');
+    element.textContent = text;
+    return element.innerHTML;
+}
+
+// Render a single chat message
+function renderChatMessage(message) {
+    // Format timestamp
+    const messageTime = new Date(message.timestamp);
+    const formattedTime = messageTime.toLocaleTimeString('pt-BR', { hour: '2-digit', minute: '2-digit' });
+    
+    const messageClass = message.sender === 'client' ? 'message-user' : 'message-other';
+    const senderName = message.sender === 'client' ? 'Você' : 'Ana Rosa';
+    
+    return `
+        <div class="message ${messageClass}">
+            <div class="message-content">
+                <strong>${senderName}:</strong> ${escapeHtml(message.message)}
+            </div>
+            <div class="message-timestamp">${formattedTime}</div>
+        </div>
+    `;
+}
+
+// Server-Sent Events stream of the open chat (messages are appended as they arrive)
+let chatStream = null;
+
+function subscribeToChat(serviceId, after) {
+    closeChatStream();
+    
+    // Start after the last message already shown, so none posted in between are lost
+    const query = after != null ? `?after=${after}` : '';
+    chatStream = new EventSource(`/api/client-portal/services/${serviceId}/chat/stream${query}`);
+    chatStream.onmessage = event => {
+        const chatMessages = document.getElementById('chat-messages');
+        chatMessages.insertAdjacentHTML('beforeend', renderChatMessage(JSON.parse(event.data)));
+        chatMessages.scrollTop = chatMessages.scrollHeight;
+    };
+}
+
+function closeChatStream() {
+    if (chatStream) {
+        chatStream.close();
+        chatStream = null;
+    }
+}
+
 // Send chat message
 function sendChatMessage() {
     const messageInput = document.getElementById('chat-input');
@@ -779,39 +822,24 @@ function sendChatMessage() {
     // Clear input
     messageInput.value = '';
     
-    // Add message to chat window
-    const chatMessages = document.getElementById('chat-messages');
-    const now = new Date();
-    const formattedTime = now.toLocaleTimeString('pt-BR', { hour: '2-digit', minute: '2-digit' });
-    
-    const messageHTML = `
-        <div class="message message-user">
-            <div class="message-content">
-                <strong>Você:</strong> ${message}
-            </div>
-            <div class="message-timestamp">${formattedTime}</div>
-        </div>
-    `;
-    
-    chatMessages.innerHTML += messageHTML;
-    
-    // Scroll to bottom
-    chatMessages.scrollTop = chatMessages.scrollHeight;
-    
-    // Simulate a response (in a real app, this would be handled by a server)
-    setTimeout(() => {
-        const responseHTML = `
-            <div class="message message-other">
-                <div class="message-content">
-                    <strong>Ana Rosa:</strong> Obrigada pela sua mensagem! Responderei assim que possível.
-                </div>
-                <div class="message-timestamp">${formattedTime}</div>
-            </div>
-        `;
-        
-        chatMessages.innerHTML += responseHTML;
-        chatMessages.scrollTop = chatMessages.scrollHeight;
-    }, 1000);
+    // Post the message; it is appended to the chat window by the event stream
+    const serviceId = document.querySelector('.service-item.active').getAttribute('data-service-id');
+    fetch(`/api/client-portal/services/${serviceId}/chat`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ sender: 'client', message })
+    })
+    .then(response => {
+        if (!response.ok) {
+            throw new Error('Network response was not ok');
+        }
+    })
+    .catch(error => {
+        console.error('Error sending chat message:', error);
+        showAlert('error', 'Erro ao enviar mensagem. Por favor, tente novamente.');
+    });
 }
 
 // Copy PIX key
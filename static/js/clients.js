@@ -6,7 +6,8 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Set up event listeners
     document.getElementById('client-form').addEventListener('submit', handleClientSubmit);
-    document.getElementById('client-filter').addEventListener('change', loadClients);
+    document.getElementById('client-filter').addEventListener('change', () => loadClients());
+    document.getElementById('clients-load-more').addEventListener('click', () => loadClients(nextClientsCursor));
     
     // Clear form when modal is hidden
     $('#clientModal').on('hidden.bs.modal', function () {
@@ -17,10 +18,17 @@ document.addEventListener('DOMContentLoaded', function() {
 // Global variable to track if we're editing or creating
 let editingClientId = null;
 
-// Load clients from the server
-function loadClients() {
+// Clients are loaded one page at a time
+const CLIENTS_PAGE_SIZE = 50;
+let nextClientsCursor = null;
+
+// Load clients from the server (a cursor appends the next page)
+function loadClients(cursor = null) {
     const statusFilter = document.getElementById('client-filter').value;
-    const url = statusFilter ? `/api/clients?status=${statusFilter}` : '/api/clients';
+    const params = new URLSearchParams({ limit: CLIENTS_PAGE_SIZE });
+    if (statusFilter) params.set('status', statusFilter);
+    if (cursor) params.set('cursor', cursor);
+    const url = `/api/clients?${params}`;
     
     fetch(url)
         .then(response => {
@@ -29,8 +37,10 @@ function loadClients() {
             }
             return response.json();
         })
-        .then(clients => {
-            displayClients(clients);
+        .then(page => {
+            displayClients(page.items, cursor !== null);
+            nextClientsCursor = page.next_cursor;
+            document.getElementById('clients-load-more').classList.toggle('d-none', !nextClientsCursor);
         })
         .catch(error => {
             console.error('Error loading clients:', error);
@@ -39,11 +49,13 @@ function loadClients() {
 }
 
 // Display clients in the table
-function displayClients(clients) {
+function displayClients(clients, append = false) {
     const tableBody = document.getElementById('clients-table-body');
-    tableBody.innerHTML = '';
+    if (!append) {
+        tableBody.innerHTML = '';
+    }
     
-    if (clients.length === 0) {
+    if (clients.length === 0 && !append) {
         const emptyRow = document.createElement('tr');
         emptyRow.innerHTML = `
             <td colspan="6" class="text-center">Nenhum cliente encontrado</td>
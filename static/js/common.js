@@ -42,48 +42,26 @@ function formatDateTime(dateString) {
 
 // Get dashboard stats
 function getDashboardStats() {
-    const promises = [
-        fetch('/api/clients').then(res => res.json()),
-        fetch('/api/initiatives').then(res => res.json()),
-        fetch('/api/mentorships').then(res => res.json())
-    ];
-    
-    Promise.all(promises)
-        .then(([clients, initiatives, mentorships]) => {
-            // Count client statuses
-            const prospectClients = clients.filter(c => c.status === 'prospect').length;
-            const activeClients = clients.filter(c => c.status === 'active').length;
-            const completedClients = clients.filter(c => c.status === 'completed').length;
-            
-            // Count initiative statuses
-            const pendingInitiatives = initiatives.filter(i => i.status === 'pending').length;
-            const inProgressInitiatives = initiatives.filter(i => i.status === 'in_progress').length;
-            const completedInitiatives = initiatives.filter(i => i.status === 'completed').length;
-            
-            // Count mentorship statuses
-            const initialContactMentorships = mentorships.filter(m => m.status === 'initial_contact').length;
-            const proposalSentMentorships = mentorships.filter(m => m.status === 'proposal_sent').length;
-            const contractSignedMentorships = mentorships.filter(m => m.status === 'contract_signed').length;
-            const inProgressMentorships = mentorships.filter(m => m.status === 'in_progress').length;
-            const completedMentorships = mentorships.filter(m => m.status === 'completed').length;
-            
+    fetch('/api/stats')
+        .then(res => res.json())
+        .then(({ clients, initiatives, mentorships }) => {
             // Update DOM
-            document.getElementById('total-clients').textContent = clients.length;
-            document.getElementById('prospect-clients').textContent = prospectClients;
-            document.getElementById('active-clients').textContent = activeClients;
-            document.getElementById('completed-clients').textContent = completedClients;
+            document.getElementById('total-clients').textContent = clients.total;
+            document.getElementById('prospect-clients').textContent = clients.by_status.prospect;
+            document.getElementById('active-clients').textContent = clients.by_status.active;
+            document.getElementById('completed-clients').textContent = clients.by_status.completed;
             
-            document.getElementById('total-initiatives').textContent = initiatives.length;
-            document.getElementById('pending-initiatives').textContent = pendingInitiatives;
-            document.getElementById('inprogress-initiatives').textContent = inProgressInitiatives;
-            document.getElementById('completed-initiatives').textContent = completedInitiatives;
+            document.getElementById('total-initiatives').textContent = initiatives.total;
+            document.getElementById('pending-initiatives').textContent = initiatives.by_status.pending;
+            document.getElementById('inprogress-initiatives').textContent = initiatives.by_status.in_progress;
+            document.getElementById('completed-initiatives').textContent = initiatives.by_status.completed;
             
-            document.getElementById('total-mentorships').textContent = mentorships.length;
-            document.getElementById('initial-mentorships').textContent = initialContactMentorships;
-            document.getElementById('proposal-mentorships').textContent = proposalSentMentorships;
-            document.getElementById('contract-mentorships').textContent = contractSignedMentorships;
-            document.getElementById('inprogress-mentorships').textContent = inProgressMentorships;
-            document.getElementById('completed-mentorships').textContent = completedMentorships;
+            document.getElementById('total-mentorships').textContent = mentorships.total;
+            document.getElementById('initial-mentorships').textContent = mentorships.by_status.initial_contact;
+            document.getElementById('proposal-mentorships').textContent = mentorships.by_status.proposal_sent;
+            document.getElementById('contract-mentorships').textContent = mentorships.by_status.contract_signed;
+            document.getElementById('inprogress-mentorships').textContent = mentorships.by_status.in_progress;
+            document.getElementById('completed-mentorships').textContent = mentorships.by_status.completed;
         })
         .catch(error => {
             console.error('Error loading dashboard stats:', error);
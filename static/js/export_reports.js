@@ -1,4 +1,8 @@
 // Export functionality for reports and analytics
+
+// Give up on an export job that hasn't finished after this long
+const EXPORT_JOB_TIMEOUT_MS = 10 * 60 * 1000;
+
 class ReportExporter {
     constructor() {
         this.initializeExportButtons();
@@ -110,20 +114,58 @@ class ReportExporter {
         });
     }
 
+    // Request an export; large exports answer 202 with a background job,
+    // which is polled until its file can be downloaded
+    async fetchExport(url) {
+        const response = await fetch(url, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                dateRange: document.getElementById('reportDateRange').value,
+                format: document.getElementById('exportFormat').value
+            })
+        });
+
+        if (response.status !== 202) {
+            return response;
+        }
+
+        const job = await response.json();
+        const deadline = Date.now() + EXPORT_JOB_TIMEOUT_MS;
+        while (Date.now() < deadline) {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            const statusResponse = await fetch(job.status_url);
+            if (!statusResponse.ok) {
+                return statusResponse;
+            }
+            const status = await statusResponse.json();
+            if (status.status === 'done') {
+                return fetch(job.result_url);
+            }
+            if (status.total) {
+                const percent = Math.min(100, Math.round(100 * status.progress / status.total));
+                const indicator = document.getElementById('exportLoading');
+                if (indicator) {
+                    if (!indicator.querySelector('.export-progress')) {
+                        indicator.insertAdjacentHTML('beforeend', '<span class="export-progress"></span>');
+                    }
+                    indicator.querySelector('.export-progress').textContent = ` ${percent}%`;
+                }
+            }
+            if (status.status === 'failed') {
+                return new Response(null, { status: 500 });
+            }
+        }
+        return new Response(null, { status: 504 });
+    }
+
     async exportClientsReport() {
         this.showLoadingIndicator('Gerando relatório de clientes...');
         
         try {
-            const response = await fetch('/api/export/clients', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    dateRange: document.getElementById('reportDateRange').value,
-                    format: document.getElementById('exportFormat').value
-                })
-            });
+            const response = await this.fetchExport('/api/export/clients');
 
             if (response.ok) {
                 const blob = await response.blob();
@@ -146,16 +188,7 @@ class ReportExporter {
         this.showLoadingIndicator('Gerando relatório de mentorships...');
         
         try {
-            const response = await fetch('/api/export/mentorships', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    dateRange: document.getElementById('reportDateRange').value,
-                    format: document.getElementById('exportFormat').value
-                })
-            });
+            const response = await this.fetchExport('/api/export/mentorships');
 
             if (response.ok) {
                 const blob = await response.blob();
@@ -177,16 +210,7 @@ class ReportExporter {
         this.showLoadingIndicator('Gerando relatório financeiro...');
         
         try {
-            const response = await fetch('/api/export/financial', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    dateRange: document.getElementById('reportDateRange').value,
-                    format: document.getElementById('exportFormat').value
-                })
-            });
+            const response = await this.fetchExport('/api/export/financial');
 
             if (response.ok) {
                 const blob = await response.blob();
@@ -208,16 +232,7 @@ class ReportExporter {
         this.showLoadingIndicator('Gerando analytics completo...');
         
         try {
-            const response = await fetch('/api/export/analytics', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    dateRange: document.getElementById('reportDateRange').value,
-                    format: document.getElementById('exportFormat').value
-                })
-            });
+            const response = await this.fetchExport('/api/export/analytics');
 
             if (response.ok) {
                 const blob = await response.blob();
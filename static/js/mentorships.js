@@ -7,7 +7,8 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Set up event listeners
     document.getElementById('mentorship-form').addEventListener('submit', handleMentorshipSubmit);
-    document.getElementById('mentorship-status-filter').addEventListener('change', loadMentorships);
+    document.getElementById('mentorship-status-filter').addEventListener('change', () => loadMentorships());
+    document.getElementById('mentorships-load-more').addEventListener('click', () => loadMentorships(nextMentorshipsCursor));
     
     // Set up meeting form functionality
     document.getElementById('add-meeting-btn').addEventListener('click', addMeetingToForm);
@@ -36,9 +37,13 @@ let editingMentorshipId = null;
 let currentMeetings = [];
 let currentDocuments = [];
 
+// Mentorships are loaded one page at a time
+const MENTORSHIPS_PAGE_SIZE = 50;
+let nextMentorshipsCursor = null;
+
 // Load clients for dropdown
 function loadClients() {
-    fetch('/api/clients')
+    fetch('/api/clients?fields=name')
         .then(response => {
             if (!response.ok) {
                 throw new Error('Network response was not ok');
@@ -64,10 +69,13 @@ function loadClients() {
         });
 }
 
-// Load mentorships from the server
-function loadMentorships() {
+// Load mentorships from the server (a cursor appends the next page)
+function loadMentorships(cursor = null) {
     const statusFilter = document.getElementById('mentorship-status-filter').value;
-    const url = statusFilter ? `/api/mentorships?status=${statusFilter}` : '/api/mentorships';
+    const params = new URLSearchParams({ limit: MENTORSHIPS_PAGE_SIZE });
+    if (statusFilter) params.set('status', statusFilter);
+    if (cursor) params.set('cursor', cursor);
+    const url = `/api/mentorships?${params}`;
     
     fetch(url)
         .then(response => {
@@ -76,8 +84,10 @@ function loadMentorships() {
             }
             return response.json();
         })
-        .then(mentorships => {
-            displayMentorships(mentorships);
+        .then(page => {
+            displayMentorships(page.items, cursor !== null);
+            nextMentorshipsCursor = page.next_cursor;
+            document.getElementById('mentorships-load-more').classList.toggle('d-none', !nextMentorshipsCursor);
         })
         .catch(error => {
             console.error('Error loading mentorships:', error);
@@ -86,11 +96,13 @@ function loadMentorships() {
 }
 
 // Display mentorships in the table
-function displayMentorships(mentorships) {
+function displayMentorships(mentorships, append = false) {
     const tableBody = document.getElementById('mentorships-table-body');
-    tableBody.innerHTML = '';
+    if (!append) {
+        tableBody.innerHTML = '';
+    }
     
-    if (mentorships.length === 0) {
+    if (mentorships.length === 0 && !append) {
         const emptyRow = document.createElement('tr');
         emptyRow.innerHTML = `
             <td colspan="6" class="text-center">Nenhuma mentoria encontrada</td>
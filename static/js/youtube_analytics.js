@@ -360,30 +360,40 @@ function displayProspects(prospects, containerId = 'prospects-container') {
     document.getElementById('import-all-prospects-btn').addEventListener('click', importAllProspects);
 }
 
-// Add a prospect to clients
-function addProspectToClients(name, email) {
-    // In a real application, this would call the API to add a client
-    fetch('/api/clients', {
+// Send prospects to the bulk import API in a single request
+function importProspects(prospects) {
+    return fetch('/api/clients/bulk', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json'
         },
-        body: JSON.stringify({
-            name: name,
-            email: email,
-            phone: '', // This would be empty initially
+        body: JSON.stringify(prospects.map(prospect => ({
+            name: prospect.name,
+            email: prospect.email,
             status: 'prospect',
             notes: 'Prospect gerado a partir de visualizações do YouTube'
-        })
+        })))
     })
     .then(response => {
         if (!response.ok) {
             throw new Error('Network response was not ok');
         }
         return response.json();
-    })
+    });
+}
+
+// Add a prospect to clients
+function addProspectToClients(name, email) {
+    importProspects([{ name: name, email: email }])
     .then(data => {
-        showAlert('success', `Prospect ${name} adicionado com sucesso!`);
+        const result = data.results[0];
+        if (result.status === 'created') {
+            showAlert('success', `Prospect ${name} adicionado com sucesso!`);
+        } else if (result.status === 'exists') {
+            showAlert('success', `${name} já está na base de clientes.`);
+        } else {
+            throw new Error(result.error || result.status);
+        }
     })
     .catch(error => {
         console.error('Error adding prospect:', error);
@@ -398,11 +408,27 @@ function importAllProspects() {
     
     // Show confirmation dialog
     if (confirm(`Deseja importar ${buttons.length} prospects para a base de clientes?`)) {
-        // Import each prospect
-        buttons.forEach(button => {
-            const name = button.getAttribute('data-name');
-            const email = button.getAttribute('data-email');
-            addProspectToClients(name, email);
+        const prospects = Array.from(buttons).map(button => ({
+            name: button.getAttribute('data-name'),
+            email: button.getAttribute('data-email')
+        }));
+        
+        // Import every prospect in one round trip
+        importProspects(prospects)
+        .then(data => {
+            const skipped = data.exists + data.duplicate;
+            let message = `${data.created} prospects importados com sucesso!`;
+            if (skipped) {
+                message += ` ${skipped} já estavam na base.`;
+            }
+            if (data.invalid) {
+                message += ` ${data.invalid} com dados inválidos.`;
+            }
+            showAlert('success', message);
+        })
+        .catch(error => {
+            console.error('Error importing prospects:', error);
+            showAlert('error', `Erro ao importar prospects: ${error.message}`);
         });
     }
 }